@@ -6,6 +6,10 @@ from .models import (
     FileUpload, MpesaPayment, WalletTransaction, WithdrawalRequest,
     Notification, Message
 )
+from .caching import bump_version_on_commit
+from .feed import invalidate_feed
+from .notifications import GLOBAL_VERSION
+from .search import index_job
 
 # Unregister the default Group model to keep admin clean
 admin.site.unregister(Group)
@@ -48,6 +52,11 @@ class JobAdmin(admin.ModelAdmin):
     list_filter = ['status', 'payment_type', 'is_urgent', 'created_at']
     search_fields = ['title', 'description', 'client__full_name', 'client__email']
     readonly_fields = ['id', 'created_at', 'updated_at']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        index_job(obj)
+        invalidate_feed()
 
 @admin.register(JobApplication)
 class JobApplicationAdmin(admin.ModelAdmin):
@@ -120,6 +129,18 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ['title', 'notification_type', 'is_global', 'created_at']
     list_filter = ['notification_type', 'is_global', 'created_at']
     search_fields = ['title', 'message']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_version_on_commit(GLOBAL_VERSION)
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_version_on_commit(GLOBAL_VERSION)
+    
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_version_on_commit(GLOBAL_VERSION)
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Backends that keep their entries inside one process
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """Whether a version bump made in this process is seen by every other process."""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def _seed():
+    # Seed from the clock (microseconds) so a counter lost to eviction restarts
+    # above every value it could have reached before
+    return time.time_ns() // 1000
+
+
+def get_version(name):
+    """Current value of a named version counter, created on first use."""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Advance a named version counter so everything keyed on the old value goes stale."""
+    key = _version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Never read or evicted: a fresh seed is already newer than any old value
+        if cache.add(key, _seed(), timeout=None):
+            return cache.get(key)
+        return cache.incr(key)
+
+
+def bump_version_on_commit(name):
+    """Bump once the surrounding transaction commits, so readers never cache pre-commit rows."""
+    transaction.on_commit(lambda: bump_version(name))
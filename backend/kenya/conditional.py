@@ -0,0 +1,79 @@
+import hashlib
+import time
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+
+from .caching import bump_version_on_commit, get_version
+from .feed import FEED_CACHE_TIMEOUT, FEED_VERSION
+from .models import Message, User, UserNotificationState
+from .notifications import GLOBAL_VERSION
+
+# Validators for the read endpoints, for use with django.views.decorators.http.condition.
+# Each one is a handful of indexed lookups at most and never renders the body; on
+# a matching If-None-Match the view is skipped and a 304 goes out instead.
+
+
+def _etag(request, *parts):
+    # The query string and Accept header select the representation, so they are part of the tag
+    raw = '|'.join(
+        [request.path, request.GET.urlencode(), request.META.get('HTTP_ACCEPT', '')] +
+        [str(part) for part in parts]
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _user_version(user_id):
+    return get_version(f'user:{user_id}')
+
+
+def touch_users(*user_ids):
+    """Invalidate the per-user validators once the surrounding transaction commits.
+
+    Call from writes that change what get_overview or get_user_profile return
+    without saving the User row itself.
+    """
+    for user_id in set(user_ids):
+        if user_id:
+            bump_version_on_commit(f'user:{user_id}')
+
+
+def user_etag(request, *args, **kwargs):
+    user_id = request.GET.get('user_id')
+    try:
+        # The overview carries the notification badge and the UserStats totals, so both rows are part of the tag
+        row = User.objects.filter(id=user_id).values_list(
+            'updated_at', 'notification_state__updated_at', 'stats__updated_at'
+        ).first()
+    except (ValidationError, ValueError):
+        return None
+    if row is None:
+        return None
+    return _etag(request, row[0].isoformat(), row[1], row[2], _user_version(user_id), get_version(GLOBAL_VERSION))
+
+
+def jobs_etag(request, *args, **kwargs):
+    # Applicant counts change without a bump, so the tag also rolls over once per cache window
+    return _etag(request, get_version(FEED_VERSION), int(time.time() // FEED_CACHE_TIMEOUT))
+
+
+def messages_etag(request, *args, **kwargs):
+    try:
+        state = Message.objects.filter(recipient_id=request.GET.get('user_id')).aggregate(
+            count=Count('id'), last_sent=Max('sent_at'), last_read=Max('read_at')
+        )
+    except (ValidationError, ValueError):
+        return None
+    return _etag(request, state['count'], state['last_sent'], state['last_read'])
+
+
+def notifications_etag(request, *args, **kwargs):
+    # The state row moves on every delivery to and mark-read by this user,
+    # the global version on every announcement
+    try:
+        read_state = UserNotificationState.objects.filter(
+            user_id=request.GET.get('user_id')
+        ).values_list('updated_at', flat=True).first()
+    except (ValidationError, ValueError):
+        return None
+    return _etag(request, read_state, get_version(GLOBAL_VERSION))
@@ -0,0 +1,144 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .counters import adjust_user_stats
+from .models import Conversation, Message, UserStats
+from .pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_page
+from .serializers import serialize_conversation, serialize_message
+
+# Characters of the newest message kept on the thread for the inbox
+PREVIEW_LENGTH = 140
+
+
+def participants(user_id, other_id):
+    """The (user_a, user_b) pair for two user ids, in the order the table stores it."""
+    return tuple(sorted([user_id, other_id]))
+
+
+def get_or_create_conversation(sender, recipient, job=None):
+    user_a, user_b = participants(sender.pk, recipient.pk)
+    conversation, _ = Conversation.objects.get_or_create(
+        user_a_id=user_a,
+        user_b_id=user_b,
+        job=job
+    )
+    return conversation
+
+
+def is_participant(conversation, user):
+    return user.pk in (conversation.user_a_id, conversation.user_b_id)
+
+
+def _unread_field(user_a_id, user_id):
+    # A thread with oneself counts on the user_a side
+    return 'unread_a' if user_id == user_a_id else 'unread_b'
+
+
+def record_message(message):
+    """Move the thread's snapshot to message and count it unread for the recipient.
+
+    Call in the transaction that created message. The snapshot only moves
+    forward, so two messages committing out of order leave the newer one.
+    """
+    conversation = message.conversation
+    Conversation.objects.filter(id=conversation.id, last_message_at__lte=message.sent_at).update(
+        last_message=message,
+        last_sender_id=message.sender_id,
+        last_message_preview=message.content[:PREVIEW_LENGTH],
+        last_message_at=message.sent_at
+    )
+    unread = _unread_field(conversation.user_a_id, message.recipient_id)
+    Conversation.objects.filter(id=conversation.id).update(**{unread: F(unread) + 1})
+    adjust_user_stats({message.recipient_id: {'unread_messages': 1}})
+
+
+def unread_messages(user):
+    """Total unread messages for user: the UserStats counter, one primary-key lookup."""
+    return UserStats.objects.filter(user=user).values_list('unread_messages', flat=True).first() or 0
+
+
+def mark_received_read(user, conversation=None, message_ids=None, before=None):
+    """Mark user's unread received messages read; returns how many changed.
+
+    The selectors narrow each other: a thread, a list of ids, and messages
+    sent at or before a time. Whatever the number of messages this is one
+    UPDATE of Message, with the affected threads locked first so each
+    counter drops by exactly the rows marked in it.
+    """
+    messages = Message.objects.filter(recipient=user, is_read=False)
+    if conversation is not None:
+        messages = messages.filter(conversation=conversation)
+    if message_ids is not None:
+        messages = messages.filter(id__in=message_ids)
+    if before is not None:
+        messages = messages.filter(sent_at__lte=before)
+
+    with transaction.atomic():
+        # Lock in id order, as record_message's counter update waits on the same rows
+        threads = dict(
+            Conversation.objects.select_for_update()
+            .filter(id__in=messages.values('conversation_id'))
+            .order_by('id').values_list('id', 'user_a_id')
+        )
+        # Messages without a thread (e.g. created in the admin) have no counter to
+        # move; a thread that gained its first unread message since the lock waits
+        # for the next call
+        messages = messages.filter(Q(conversation_id__in=list(threads)) | Q(conversation__isnull=True))
+        per_thread = dict(
+            messages.filter(conversation__isnull=False)
+            .values_list('conversation_id').annotate(count=Count('id')).order_by()
+        )
+        marked = messages.update(is_read=True, read_at=timezone.now())
+
+        # One UPDATE per side and distinct amount rather than one per thread
+        by_amount = defaultdict(list)
+        for conversation_id, count in per_thread.items():
+            by_amount[(_unread_field(threads[conversation_id], user.pk), count)].append(conversation_id)
+        for (field, count), conversation_ids in by_amount.items():
+            Conversation.objects.filter(id__in=conversation_ids).update(**{field: Greatest(F(field) - count, 0)})
+        adjust_user_stats({user.pk: {'unread_messages': -marked}})
+    return marked
+
+
+def conversation_inbox(user, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of user's threads, most recently active first; never touches Message.
+
+    Each side of the pair is read in its own inbox index order and stops
+    after a page, then the two pages are merged.
+    """
+    fields = ('last_message_at', 'id')
+    sides = (
+        Conversation.objects.filter(user_a=user),
+        # A thread with oneself is already on the user_a side
+        Conversation.objects.filter(user_b=user).exclude(user_a=user),
+    )
+    threads = []
+    more = False
+    for side in sides:
+        rows, side_cursor = keyset_page(side.select_related('user_a', 'user_b', 'job'), fields, cursor, limit)
+        threads.extend(rows)
+        more = more or side_cursor is not None
+    threads.sort(key=lambda conversation: (conversation.last_message_at, conversation.id), reverse=True)
+
+    page = threads[:limit]
+    next_cursor = None
+    if more or len(threads) > limit:
+        next_cursor = encode_cursor([page[-1].last_message_at, page[-1].id])
+    return {
+        'conversations': [serialize_conversation(conversation, user) for conversation in page],
+        'next_cursor': next_cursor
+    }
+
+
+def thread_page(conversation, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of a thread's messages, newest first, read from message_thread_idx."""
+    messages = conversation.messages.select_related('sender', 'job')
+    page, next_cursor = keyset_page(messages, ('sent_at', 'id'), cursor, limit)
+    return {
+        'messages': [serialize_message(message) for message in page],
+        'next_cursor': next_cursor
+    }
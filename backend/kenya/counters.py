@@ -0,0 +1,200 @@
+from collections import Counter
+
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Job, JobApplication, Message, UserStats, WalletTransaction
+
+# Job status -> the UserStats fields a job in that status counts towards, for
+# its client and for its assigned freelancer
+JOB_STATUS_STATS = {
+    'in_progress': (('in_progress_jobs',), ('in_progress_jobs', 'assigned_jobs')),
+    'completed': (('completed_jobs',), ('completed_jobs',)),
+}
+
+
+def adjust_user_stats(deltas):
+    """Apply {user_id: {field: delta}} to UserStats, creating missing rows.
+
+    Call inside the transaction making the change. Rows are updated in user
+    id order so two writes touching the same pair of users cannot deadlock.
+    Counters stop at zero; a row that had drifted is left to verify_user_stats.
+    """
+    deltas = {user_id: changes for user_id, changes in deltas.items() if user_id and any(changes.values())}
+    if not deltas:
+        return
+    UserStats.objects.bulk_create([UserStats(user_id=user_id) for user_id in deltas], ignore_conflicts=True)
+    now = timezone.now()
+    for user_id in sorted(deltas):
+        UserStats.objects.filter(user_id=user_id).update(
+            **{field: Greatest(F(field) + delta, 0) for field, delta in deltas[user_id].items() if delta},
+            updated_at=now
+        )
+
+
+def _job_stats(status, client_id, freelancer_id):
+    client_fields, freelancer_fields = JOB_STATUS_STATS.get(status, ((), ()))
+    stats = {client_id: Counter(client_fields)}
+    if freelancer_id:
+        # Someone working their own job still counts it once
+        stats[freelancer_id] = stats.get(freelancer_id, Counter()) | Counter(freelancer_fields)
+    return stats
+
+
+def set_job_status(job, status, **changes):
+    """Move job to status, with any other field changes, and keep its users' stats in step.
+
+    Call inside transaction.atomic(). Returns False if the job was no longer in
+    the status we loaded it with (a concurrent request got there first).
+    """
+    previous = job.status
+    if previous == status:
+        return False
+
+    updated = Job.objects.filter(pk=job.pk, status=previous).update(
+        status=status, updated_at=timezone.now(), **changes
+    )
+    if not updated:
+        return False
+
+    before = _job_stats(previous, job.client_id, job.assigned_freelancer_id)
+    job.status = status
+    for field, value in changes.items():
+        setattr(job, field, value)
+    after = _job_stats(status, job.client_id, job.assigned_freelancer_id)
+
+    deltas = {}
+    for user_id in set(before) | set(after):
+        old, new = before.get(user_id, Counter()), after.get(user_id, Counter())
+        deltas[user_id] = {field: new[field] - old[field] for field in set(old) | set(new)}
+    adjust_user_stats(deltas)
+    return True
+
+
+def application_created(job_id, freelancer_id, status='pending'):
+    """Count a newly created application against its job and its freelancer."""
+    updates = {'applications_count': F('applications_count') + 1}
+    if status == 'pending':
+        updates['pending_applications_count'] = F('pending_applications_count') + 1
+        adjust_user_stats({freelancer_id: {'pending_applications': 1}})
+    Job.objects.filter(pk=job_id).update(**updates)
+
+
+def set_application_status(application, status):
+    """Move an application to status and keep the pending counters in step.
+
+    Call inside transaction.atomic() so the status change and the counter
+    update commit together. Returns False if the application was no longer in
+    the status we loaded it with (a concurrent request got there first).
+    """
+    previous = application.status
+    if previous == status:
+        return False
+
+    updated = JobApplication.objects.filter(
+        pk=application.pk, status=previous
+    ).update(status=status)
+    if not updated:
+        return False
+
+    delta = (status == 'pending') - (previous == 'pending')
+    if delta:
+        Job.objects.filter(pk=application.job_id).update(
+            pending_applications_count=F('pending_applications_count') + delta
+        )
+        adjust_user_stats({application.freelancer_id: {'pending_applications': delta}})
+    application.status = status
+    return True
+
+
+def _application_count(status=None):
+    applications = JobApplication.objects.filter(job=OuterRef('pk'))
+    if status:
+        applications = applications.filter(status=status)
+    return Coalesce(
+        Subquery(
+            applications.order_by().values('job').annotate(total=Count('id')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def recount_job_applications(jobs=None):
+    """Recompute both counters from JobApplication rows with one UPDATE.
+
+    Only jobs whose stored counters have drifted are written. Returns the
+    number of jobs repaired.
+    """
+    if jobs is None:
+        jobs = Job.objects.all()
+    drifted = jobs.annotate(
+        actual_pending=_application_count('pending'),
+        actual_total=_application_count()
+    ).exclude(
+        pending_applications_count=F('actual_pending'),
+        applications_count=F('actual_total')
+    ).values('pk')
+    return Job.objects.filter(pk__in=drifted).update(
+        pending_applications_count=_application_count('pending'),
+        applications_count=_application_count()
+    )
+
+
+def _user_count(queryset, user_field='user'):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{user_field: OuterRef('user')}).order_by()
+            .values(user_field).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _job_count(status, as_freelancer_only=False):
+    # Client and freelancer are two index lookups rather than one OR over both columns
+    freelancer = _user_count(Job.objects.filter(status=status), 'assigned_freelancer')
+    if as_freelancer_only:
+        return freelancer
+    own = _user_count(Job.objects.filter(status=status, assigned_freelancer=F('client')), 'client')
+    return _user_count(Job.objects.filter(status=status), 'client') + freelancer - own
+
+
+def _actual_user_stats():
+    return {
+        'completed_jobs': _job_count('completed'),
+        'in_progress_jobs': _job_count('in_progress'),
+        'assigned_jobs': _job_count('in_progress', as_freelancer_only=True),
+        'pending_applications': _user_count(JobApplication.objects.filter(status='pending'), 'freelancer'),
+        'unread_messages': _user_count(Message.objects.filter(is_read=False), 'recipient'),
+        'referral_earnings': Coalesce(
+            Subquery(
+                WalletTransaction.objects.filter(
+                    user=OuterRef('user'), transaction_type='referral_bonus', wallet_type='referral'
+                ).order_by().values('user').annotate(total=Sum('amount')).values('total'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            0,
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    }
+
+
+def drifted_user_stats(user_ids):
+    """The UserStats rows among user_ids (created if missing) that disagree with the source tables."""
+    UserStats.objects.bulk_create([UserStats(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    actual = _actual_user_stats()
+    mismatch = Q()
+    for field in actual:
+        mismatch |= ~Q(**{field: F(f'actual_{field}')})
+    return UserStats.objects.filter(user_id__in=user_ids).annotate(
+        **{f'actual_{field}': expression for field, expression in actual.items()}
+    ).filter(mismatch)
+
+
+def recount_user_stats(user_ids):
+    """Recompute the drifted UserStats among user_ids with one UPDATE; returns the number repaired."""
+    drifted = drifted_user_stats(user_ids).values('pk')
+    return UserStats.objects.filter(pk__in=drifted).update(**_actual_user_stats(), updated_at=timezone.now())
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Channels: 'user:<id>' for one user, plus two shared by every stream
+GLOBAL_CHANNEL = 'global'
+JOBS_CHANNEL = 'jobs'
+
+# Comment line sent on idle streams so proxies and load balancers keep them open
+HEARTBEAT_INTERVAL = 15
+# Client reconnect delay, in milliseconds
+RETRY_MS = 3000
+# Events buffered per stream before the client is told to refetch instead
+SUBSCRIBER_QUEUE_SIZE = 100
+REDIS_CHANNEL_PREFIX = 'kenya:events:'
+
+
+class Subscription:
+    def __init__(self, channels, loop):
+        self.channels = channels
+        self.loop = loop
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, event):
+        # Publishers run in request threads; the queue belongs to the stream's event loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # Loop already closed, the stream is going away
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LocalBroker:
+    """In-process pub/sub: events reach the streams held by this process only.
+
+    Enough for a single worker. Each idle stream costs one small queue and a
+    suspended coroutine.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channels):
+        subscription = Subscription(tuple(channels), asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def dispatch(self, channel, event):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def publish(self, channel, event):
+        self.dispatch(channel, event)
+
+
+class RedisBroker(LocalBroker):
+    """Pub/sub through Redis, for more than one worker process.
+
+    Publishers PUBLISH to Redis only; one listener task per process
+    PSUBSCRIBEs to every channel and dispatches to the local streams.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self._client = None
+        self._listener = None
+
+    def publish(self, channel, event):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(REDIS_CHANNEL_PREFIX + channel, json.dumps(event, cls=DjangoJSONEncoder))
+
+    def subscribe(self, channels):
+        subscription = super().subscribe(channels)
+        if self._listener is None or self._listener.done():
+            self._listener = subscription.loop.create_task(self._listen())
+        return subscription
+
+    async def _listen(self):
+        import redis.asyncio
+
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(REDIS_CHANNEL_PREFIX + '*')
+                    async for message in pubsub.listen():
+                        if message['type'] != 'pmessage':
+                            continue
+                        channel = message['channel'].decode()[len(REDIS_CHANNEL_PREFIX):]
+                        self.dispatch(channel, json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Event listener lost its Redis connection, reconnecting')
+                await asyncio.sleep(1)
+
+
+_broker = None
+
+
+def broker_is_shared():
+    """Whether events published in this process reach streams held by other processes."""
+    return bool(getattr(settings, 'EVENTS_REDIS_URL', ''))
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        url = getattr(settings, 'EVENTS_REDIS_URL', '')
+        _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def publish(channel, event_type, data, skills=None):
+    """Push an event to the streams on channel once the current transaction commits.
+
+    skills narrows a shared-channel event to users holding any of those skill ids.
+    """
+    event = {'id': time.time_ns() // 1000, 'type': event_type, 'data': data}
+    if skills is not None:
+        event['skills'] = [str(skill) for skill in skills]
+
+    def send():
+        try:
+            get_broker().publish(channel, event)
+        except Exception:
+            # Streams are best effort; the REST endpoints stay the source of truth
+            logger.exception('Could not publish %s event on %s', event_type, channel)
+
+    transaction.on_commit(send)
+
+
+@asynccontextmanager
+async def subscription(*channels):
+    """Listen on channels for the duration of the block; events published meanwhile are queued."""
+    broker = get_broker()
+    subscribed = broker.subscribe(channels)
+    try:
+        yield subscribed
+    finally:
+        broker.unsubscribe(subscribed)
+
+
+def format_event(event):
+    data = json.dumps(event['data'], cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+async def event_stream(user_id, skill_ids=()):
+    """Server-sent events for one user until the client disconnects."""
+    skill_ids = {str(skill_id) for skill_id in skill_ids}
+    async with subscription(f'user:{user_id}', GLOBAL_CHANNEL, JOBS_CHANNEL) as events:
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            if events.overflowed:
+                # Events were dropped; the client should refetch over REST
+                events.overflowed = False
+                yield format_event({'id': time.time_ns() // 1000, 'type': 'resync', 'data': {}})
+            try:
+                event = await events.get(HEARTBEAT_INTERVAL)
+            except TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if 'skills' in event and not skill_ids.intersection(event['skills']):
+                continue
+            yield format_event(event)
@@ -0,0 +1,115 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import WalletTransaction
+from .pagination import keyset_filter
+
+# Rows fetched per query; each chunk is one short statement, so no server-side
+# cursor has to outlive a transaction behind the connection pooler
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+TRANSACTION_COLUMNS = (
+    'id', 'created_at', 'user_id', 'user__email', 'transaction_type', 'wallet_type',
+    'amount', 'reference', 'job_id', 'description',
+)
+TRANSACTION_TYPES = {choice for choice, _ in WalletTransaction.TRANSACTION_TYPE_CHOICES}
+
+
+class InvalidExport(ValueError):
+    pass
+
+
+def _parse_bound(value, end_of_day):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise InvalidExport(f'Invalid date {value}')
+        # A bare end date includes the whole day
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_export_filters(params):
+    """start/end (ISO date or timestamp, inclusive), transaction_type (comma separated), wallet_type."""
+    types = [value for value in params.get('transaction_type', '').split(',') if value]
+    if set(types) - TRANSACTION_TYPES:
+        raise InvalidExport('Unknown transaction_type')
+    wallet_type = params.get('wallet_type') or None
+    if wallet_type not in (None, 'earnings', 'referral'):
+        raise InvalidExport('wallet_type must be "earnings" or "referral"')
+    return {
+        'start': _parse_bound(params['start'], False) if params.get('start') else None,
+        'end': _parse_bound(params['end'], True) if params.get('end') else None,
+        'transaction_types': types,
+        'wallet_type': wallet_type,
+    }
+
+
+def filter_transactions(filters, user_id=None):
+    transactions = WalletTransaction.objects.all()
+    if user_id is not None:
+        transactions = transactions.filter(user_id=user_id)
+    if filters['start']:
+        transactions = transactions.filter(created_at__gte=filters['start'])
+    if filters['end']:
+        transactions = transactions.filter(created_at__lte=filters['end'])
+    if filters['transaction_types']:
+        transactions = transactions.filter(transaction_type__in=filters['transaction_types'])
+    if filters['wallet_type']:
+        transactions = transactions.filter(wallet_type=filters['wallet_type'])
+    return transactions
+
+
+async def _chunks(queryset, chunk_size):
+    # Oldest first, keyset on (created_at, id), so memory stays at one chunk
+    after = None
+    while True:
+        page = queryset.order_by('created_at', 'id')
+        if after is not None:
+            page = page.filter(keyset_filter(('created_at', 'id'), after, descending=False))
+        rows = [row async for row in page.values(*TRANSACTION_COLUMNS)[:chunk_size]]
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1]['created_at'], rows[-1]['id'])
+
+
+class _Line:
+    # csv.writer target that hands back each formatted line
+    def write(self, value):
+        return value
+
+
+async def csv_stream(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Line())
+    yield writer.writerow([column.replace('__', '_') for column in TRANSACTION_COLUMNS])
+    async for rows in _chunks(queryset, chunk_size):
+        yield ''.join(writer.writerow([row[column] for column in TRANSACTION_COLUMNS]) for row in rows)
+
+
+async def ndjson_stream(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    async for rows in _chunks(queryset, chunk_size):
+        yield ''.join(
+            json.dumps({column.replace('__', '_'): row[column] for column in TRANSACTION_COLUMNS},
+                       cls=DjangoJSONEncoder, separators=(',', ':')) + '\n'
+            for row in rows
+        )
+
+
+def export_stream(queryset, fmt):
+    return csv_stream(queryset) if fmt == 'csv' else ndjson_stream(queryset)
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+
+from .caching import bump_version_on_commit, get_version
+from .models import Job, JobCategory, Skill
+from .pagination import DEFAULT_PAGE_SIZE, keyset_page
+from .search import SEARCH_ORDERING, SKILL_MATCH_MODES, filter_by_skills, parse_skill_ids, search_jobs, search_terms
+from .serializers import serialize_job, with_job_relations
+
+# Bumped by every write that changes which jobs the public feed lists
+FEED_VERSION = 'jobs:feed'
+# Upper bound on staleness: applicant counts (and popular order) are not bumped
+# for, and a lost bump also expires here
+FEED_CACHE_TIMEOUT = 60
+
+FEED_ORDERINGS = {
+    'newest': ('created_at', 'id'),
+    'popular': ('applications_count', 'created_at', 'id'),
+}
+
+# (key, lower bound inclusive, upper bound exclusive) on budget_max, in KSh
+BUDGET_BUCKETS = [
+    ('under_1000', None, 1000),
+    ('1000_5000', 1000, 5000),
+    ('5000_20000', 5000, 20000),
+    ('20000_plus', 20000, None),
+]
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def parse_feed_filters(params):
+    """Normalize job feed query parameters into a plain dict.
+
+    Equivalent requests (skill order, duplicate ids, search punctuation and
+    case) normalize to the same dict, which is what the feed cache keys on.
+    """
+    sort = params.get('sort') or None
+    if sort is not None and sort not in FEED_ORDERINGS:
+        raise InvalidFilter('sort must be "newest" or "popular"')
+
+    skills_match = params.get('skills_match') or 'all'
+    if skills_match not in SKILL_MATCH_MODES:
+        raise InvalidFilter('skills_match must be "all" or "any"')
+
+    try:
+        skill_ids = parse_skill_ids(params.get('skills_required', ''))
+    except ValueError:
+        raise InvalidFilter('Invalid skill ID')
+
+    return {
+        'category_id': params.get('category_id') or None,
+        'min_budget': params.get('min_budget') or None,
+        'max_budget': params.get('max_budget') or None,
+        'search_term': ' '.join(search_terms(params.get('search_term', ''))),
+        'skills_required': sorted(str(skill_id) for skill_id in skill_ids),
+        # With a single skill both modes are the same query
+        'skills_match': skills_match if len(skill_ids) > 1 else 'all',
+        'sort': sort,
+    }
+
+
+def filter_jobs(filters):
+    jobs = Job.objects.filter(status='posted', client__is_activated=True)
+
+    if filters['category_id']:
+        jobs = jobs.filter(category_id=filters['category_id'])
+
+    if filters['min_budget']:
+        jobs = jobs.filter(budget_max__gte=filters['min_budget'])
+
+    if filters['max_budget']:
+        jobs = jobs.filter(budget_min__lte=filters['max_budget'])
+
+    if filters['search_term']:
+        jobs = search_jobs(jobs, filters['search_term'])
+
+    if filters['skills_required']:
+        jobs = filter_by_skills(jobs, filters['skills_required'], filters['skills_match'])
+
+    return jobs
+
+
+def feed_ordering(filters):
+    if filters['sort']:
+        return FEED_ORDERINGS[filters['sort']]
+    if filters['search_term']:
+        # Best hits first
+        return SEARCH_ORDERING
+    return FEED_ORDERINGS['newest']
+
+
+def job_feed_page(filters, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    page, next_cursor = keyset_page(
+        with_job_relations(filter_jobs(filters)), feed_ordering(filters), cursor, limit
+    )
+    return {
+        'jobs': [serialize_job(job) for job in page],
+        'next_cursor': next_cursor
+    }
+
+
+def _budget_bucket_sql(column):
+    cases = []
+    for key, lower, upper in BUDGET_BUCKETS:
+        bounds = []
+        if lower is not None:
+            bounds.append(f'{column} >= {lower}')
+        if upper is not None:
+            bounds.append(f'{column} < {upper}')
+        cases.append(f"WHEN {' AND '.join(bounds)} THEN '{key}'")
+    return f"CASE {' '.join(cases)} END"
+
+
+def job_facets(filters):
+    """Count the filtered feed per category, skill, payment type and budget bucket.
+
+    All four GROUP BYs run over one CTE of the filtered job ids and come back
+    as a single UNION ALL statement, i.e. one round trip and one evaluation of
+    the filters (the portable equivalent of GROUPING SETS).
+    """
+    feed_sql, feed_params = filter_jobs(filters).order_by().values('id').query.sql_with_params()
+
+    job = Job._meta.db_table
+    links = Job.skills_required.through._meta.db_table
+    category = JobCategory._meta.db_table
+    skill = Skill._meta.db_table
+
+    sql = f"""
+        WITH feed AS ({feed_sql})
+        SELECT 'category', CAST(c.id AS TEXT), c.name, COUNT(*)
+        FROM {job} j
+        JOIN feed ON feed.id = j.id
+        JOIN {category} c ON c.id = j.category_id
+        GROUP BY c.id, c.name
+        UNION ALL
+        SELECT 'skill', CAST(s.id AS TEXT), s.name, COUNT(*)
+        FROM {links} js
+        JOIN feed ON feed.id = js.job_id
+        JOIN {skill} s ON s.id = js.skill_id
+        GROUP BY s.id, s.name
+        UNION ALL
+        SELECT 'payment_type', j.payment_type, NULL, COUNT(*)
+        FROM {job} j
+        JOIN feed ON feed.id = j.id
+        GROUP BY j.payment_type
+        UNION ALL
+        SELECT 'budget', b.bucket, NULL, COUNT(*)
+        FROM (
+            SELECT {_budget_bucket_sql('j.budget_max')} AS bucket
+            FROM {job} j
+            JOIN feed ON feed.id = j.id
+        ) b
+        GROUP BY b.bucket
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, feed_params)
+        rows = cursor.fetchall()
+
+    facets = {'categories': [], 'skills': [], 'payment_types': [], 'budget': []}
+    budget_counts = {}
+    for facet, value, name, count in rows:
+        if facet == 'category':
+            facets['categories'].append({'id': str(uuid.UUID(value)), 'name': name, 'count': count})
+        elif facet == 'skill':
+            facets['skills'].append({'id': str(uuid.UUID(value)), 'name': name, 'count': count})
+        elif facet == 'payment_type':
+            facets['payment_types'].append({'value': value, 'count': count})
+        else:
+            budget_counts[value] = count
+
+    for key in ('categories', 'skills', 'payment_types'):
+        facets[key].sort(key=lambda item: -item['count'])
+    facets['budget'] = [
+        {'bucket': key, 'min': lower, 'max': upper, 'count': budget_counts.get(key, 0)}
+        for key, lower, upper in BUDGET_BUCKETS
+    ]
+
+    return {
+        'facets': facets,
+        'total': sum(item['count'] for item in facets['payment_types'])
+    }
+
+
+def cached_feed(kind, params, build):
+    """Return build() through the cache, keyed on kind, params and the feed version."""
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, separators=(',', ':')).encode()
+    ).hexdigest()
+    key = f'jobs:{kind}:{get_version(FEED_VERSION)}:{digest}'
+
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, FEED_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_feed():
+    bump_version_on_commit(FEED_VERSION)
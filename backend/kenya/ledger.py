@@ -0,0 +1,125 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import BalanceCheckpoint, LedgerAccount, LedgerEntry
+
+# Account kinds that mirror User.earnings_wallet and User.referral_wallet
+WALLET_KINDS = ('earnings', 'referral')
+
+# Entries younger than this stay out of new checkpoints. Ids are handed out at
+# insert, so a slower transaction can still commit an entry below the newest id.
+CHECKPOINT_SETTLE_TIME = timedelta(minutes=5)
+
+
+class UnbalancedJournal(ValueError):
+    pass
+
+
+def system_account(kind):
+    """The platform's own account of kind ('escrow', 'platform' or 'opening')."""
+    account, _ = LedgerAccount.objects.get_or_create(user=None, kind=kind)
+    return account
+
+
+def user_account(user, kind):
+    account, _ = LedgerAccount.objects.get_or_create(user_id=getattr(user, 'pk', user), kind=kind)
+    return account
+
+
+def post(entry_type, legs, description='', reference=None):
+    """Record one journal: legs is [(account, amount), ...] and must sum to zero.
+
+    Call inside the transaction making the matching wallet change, so the two
+    commit together. Returns the journal id.
+    """
+    legs = [(account, Decimal(str(amount))) for account, amount in legs if amount]
+    if sum(amount for _, amount in legs) != 0:
+        raise UnbalancedJournal(f'{entry_type} journal does not balance')
+    journal_id = uuid.uuid4()
+    now = timezone.now()
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(
+            journal_id=journal_id,
+            account=account,
+            amount=amount,
+            entry_type=entry_type,
+            description=description,
+            reference=reference,
+            created_at=now
+        )
+        for account, amount in legs
+    ])
+    return journal_id
+
+
+def transfer(source, destination, amount, entry_type, description='', reference=None):
+    """Move amount from source to destination as a two-leg journal."""
+    amount = Decimal(str(amount))
+    return post(entry_type, [(source, -amount), (destination, amount)], description, reference)
+
+
+def latest_checkpoint(account, as_of=None):
+    checkpoints = BalanceCheckpoint.objects.filter(account=account)
+    if as_of is None:
+        return checkpoints.order_by('-entry_id').first()
+    return checkpoints.filter(as_of__lte=as_of).order_by('-as_of', '-entry_id').first()
+
+
+def balance(account, as_of=None):
+    """account's balance now, or counting only entries created at or before as_of.
+
+    Starts from the newest checkpoint that applies and sums the entries after
+    it, so the cost follows the time since the last checkpoint rather than
+    the length of the account's history.
+    """
+    checkpoint = latest_checkpoint(account, as_of)
+    tail = LedgerEntry.objects.filter(account=account)
+    total = Decimal('0.00')
+    if checkpoint is not None:
+        tail = tail.filter(id__gt=checkpoint.entry_id)
+        total = checkpoint.balance
+    if as_of is not None:
+        tail = tail.filter(created_at__lte=as_of)
+    return total + (tail.aggregate(total=Sum('amount'))['total'] or 0)
+
+
+def wallet_balances(user, as_of=None):
+    """{'earnings': Decimal, 'referral': Decimal} for user from the ledger."""
+    balances = {kind: Decimal('0.00') for kind in WALLET_KINDS}
+    for account in LedgerAccount.objects.filter(user=user, kind__in=WALLET_KINDS):
+        balances[account.kind] = balance(account, as_of)
+    return balances
+
+
+def checkpoint(account, min_entries=1, settled_before=None):
+    """Checkpoint account's settled entries since its last checkpoint.
+
+    Returns the new BalanceCheckpoint, or None when fewer than min_entries
+    settled entries have been posted since the last one.
+    """
+    if settled_before is None:
+        settled_before = timezone.now() - CHECKPOINT_SETTLE_TIME
+    previous = latest_checkpoint(account)
+
+    entries = LedgerEntry.objects.filter(account=account)
+    if previous is not None:
+        entries = entries.filter(id__gt=previous.entry_id)
+    settled = entries.filter(created_at__lt=settled_before).aggregate(last=Max('id'), count=Count('id'))
+    if settled['last'] is None or settled['count'] < min_entries:
+        return None
+
+    # Everything up to the last settled id is covered, whatever its created_at
+    covered = entries.filter(id__lte=settled['last']).aggregate(total=Sum('amount'), newest=Max('created_at'))
+    as_of = covered['newest']
+    if previous is not None:
+        as_of = max(as_of, previous.as_of)
+    return BalanceCheckpoint.objects.create(
+        account=account,
+        entry_id=settled['last'],
+        balance=(previous.balance if previous else 0) + covered['total'],
+        as_of=as_of
+    )
@@ -0,0 +1,68 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kenya.models import Notification, Skill, User, UserSkill
+from kenya.notifications import fan_out, fan_out_in_chunks, matching_freelancers
+
+
+class Command(BaseCommand):
+    help = 'Time new-job notification fan-out against synthetic freelancers (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--freelancers', type=int, default=100000)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--include-orm', action='store_true',
+                            help='Also time the old notification.users.set() path (slow)')
+
+    def timed(self, label, func):
+        start = time.perf_counter()
+        links = func()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label:<28} {links:>8} links  {elapsed * 1000:>10.1f} ms')
+
+    def handle(self, *args, **options):
+        count = options['freelancers']
+        chunk_size = options['chunk_size']
+
+        with transaction.atomic():
+            self.stdout.write(f'Creating {count} synthetic freelancers...')
+            skill = Skill.objects.create(name=f'benchmark-{uuid.uuid4().hex[:8]}')
+            run = uuid.uuid4().hex[:8]
+            users = User.objects.bulk_create([
+                User(
+                    firebase_uid=f'bench-{run}-{i}',
+                    email=f'bench-{run}-{i}@example.com',
+                    auth_method='email',
+                    referral_code=f'B{run}{i}',
+                    is_activated=True
+                )
+                for i in range(count)
+            ], batch_size=chunk_size)
+            UserSkill.objects.bulk_create([
+                UserSkill(user=user, skill=skill, proficiency_level=3)
+                for user in users
+            ], batch_size=chunk_size)
+            del users
+
+            recipients = matching_freelancers([skill.id])
+
+            def notification():
+                return Notification.objects.create(
+                    title='Benchmark', message='Benchmark', notification_type='new_job'
+                )
+
+            self.timed('INSERT ... SELECT', lambda: fan_out(notification(), recipients))
+            self.timed(f'bulk_create x{chunk_size}', lambda: fan_out_in_chunks(notification(), recipients, chunk_size))
+
+            if options['include_orm']:
+                def orm_set():
+                    target = notification()
+                    target.users.set(User.objects.filter(id__in=recipients))
+                    return target.users.count()
+                self.timed('users.set() (old path)', orm_set)
+
+            # Leave no trace of the synthetic data
+            transaction.set_rollback(True)
@@ -0,0 +1,119 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, transaction
+
+from kenya.ledger import WALLET_KINDS, balance
+from kenya.models import LedgerAccount, LedgerEntry, User, WalletTransaction
+from kenya.wallet import InsufficientFunds, credit, debit
+
+
+class Command(BaseCommand):
+    help = 'Hammer one wallet from many threads and check that no credit or debit is lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--operations', type=int, default=2000,
+                            help='Total credits and debits across all threads')
+        parser.add_argument('--amount', default='1.00')
+        parser.add_argument('--debit-every', type=int, default=4,
+                            help='Every Nth operation is a debit (0 for credits only)')
+        parser.add_argument('--include-naive', action='store_true',
+                            help='Also run the old read-modify-write save() path to show lost updates')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the synthetic user and its ledger entries')
+
+    def run_threads(self, threads, operations, func):
+        def timed(i):
+            try:
+                start = time.perf_counter()
+                func(i)
+                return time.perf_counter() - start
+            finally:
+                close_old_connections()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            latencies = sorted(pool.map(timed, range(operations)))
+        elapsed = time.perf_counter() - start
+        return elapsed, latencies
+
+    def report(self, label, elapsed, latencies):
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        self.stdout.write(
+            f'{label:<22} {len(latencies):>7} ops  {elapsed:>7.2f} s  {len(latencies) / elapsed:>8.0f} ops/s  '
+            f'p50 {p50:>7.1f} ms  p99 {p99:>7.1f} ms'
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        operations = options['operations']
+        amount = Decimal(options['amount'])
+        debit_every = options['debit_every']
+
+        run = uuid.uuid4().hex[:8]
+        user = User.objects.create(
+            firebase_uid=f'bench-wallet-{run}',
+            email=f'bench-wallet-{run}@example.com',
+            auth_method='email',
+            referral_code=f'W{run}'
+        )
+        try:
+            insufficient = []
+
+            def operate(i):
+                if debit_every and i % debit_every == debit_every - 1:
+                    try:
+                        debit(user.pk, 'earnings', amount, 'other', 'Benchmark debit')
+                    except InsufficientFunds:
+                        insufficient.append(i)
+                else:
+                    credit(user.pk, 'earnings', amount, 'other', 'Benchmark credit')
+
+            self.report('credit()/debit()', *self.run_threads(threads, operations, operate))
+
+            debits = len([i for i in range(operations) if debit_every and i % debit_every == debit_every - 1])
+            applied_debits = debits - len(insufficient)
+            expected = amount * (operations - debits) - amount * applied_debits
+            user.refresh_from_db()
+            ledger = balance(LedgerAccount.objects.get(user=user, kind='earnings'))
+            transactions = WalletTransaction.objects.filter(user=user).count()
+            self.stdout.write(
+                f'expected {expected}  wallet {user.earnings_wallet}  ledger {ledger}  '
+                f'transactions {transactions}/{operations - len(insufficient)}  rejected debits {len(insufficient)}'
+            )
+            if not (user.earnings_wallet == ledger == expected) or transactions != operations - len(insufficient):
+                raise CommandError('Wallet, ledger and transactions disagree: updates were lost')
+
+            if options['include_naive']:
+                start_balance = user.earnings_wallet
+
+                failed = []
+
+                def naive(i):
+                    try:
+                        with transaction.atomic():
+                            target = User.objects.get(pk=user.pk)
+                            target.earnings_wallet += amount
+                            target.save()
+                    except DatabaseError:
+                        failed.append(i)  # e.g. SQLite refusing the lock upgrade
+
+                self.report('save() (old path)', *self.run_threads(threads, operations, naive))
+                user.refresh_from_db()
+                lost = (start_balance + amount * (operations - len(failed)) - user.earnings_wallet) / amount
+                self.stdout.write(f'old path lost {lost:.0f} of {operations - len(failed)} credits ({len(failed)} errored)')
+
+            self.stdout.write(self.style.SUCCESS('No lost updates through kenya.wallet'))
+        finally:
+            if not options['keep']:
+                # Leave no trace of the synthetic wallet, including the platform side of its journals
+                accounts = LedgerAccount.objects.filter(user=user, kind__in=WALLET_KINDS)
+                journals = LedgerEntry.objects.filter(account__in=accounts).values('journal_id')
+                LedgerEntry.objects.filter(journal_id__in=journals).delete()
+                accounts.delete()
+                user.delete()
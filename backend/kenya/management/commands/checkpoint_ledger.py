@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from kenya.ledger import CHECKPOINT_SETTLE_TIME, WALLET_KINDS, balance, checkpoint
+from kenya.models import LedgerAccount
+
+
+class Command(BaseCommand):
+    help = 'Write balance checkpoints for ledger accounts so balance reads only scan a short tail'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-entries', type=int, default=50,
+                            help='Only checkpoint accounts with at least this many settled entries since their last checkpoint')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Accounts loaded per query')
+        parser.add_argument('--verify', action='store_true',
+                            help='Also compare user wallet fields with their ledger balances')
+
+    def handle(self, *args, **options):
+        checked = written = mismatched = 0
+        last_id = None
+
+        while True:
+            accounts = LedgerAccount.objects.select_related('user').order_by('pk')
+            if last_id is not None:
+                accounts = accounts.filter(pk__gt=last_id)
+            accounts = list(accounts[:options['chunk_size']])
+            if not accounts:
+                break
+
+            for account in accounts:
+                if checkpoint(account, options['min_entries']):
+                    written += 1
+                if options['verify'] and account.kind in WALLET_KINDS:
+                    stored = getattr(account.user, f'{account.kind}_wallet')
+                    ledger = balance(account)
+                    if stored != ledger:
+                        mismatched += 1
+                        self.stdout.write(f'{account.user.email} {account.kind}: wallet {stored}, ledger {ledger}')
+
+            checked += len(accounts)
+            last_id = accounts[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} accounts, wrote {written} checkpoints '
+            f'(entries newer than {CHECKPOINT_SETTLE_TIME} left for the next run)'
+        ))
+        if options['verify']:
+            self.stdout.write(f'{mismatched} wallets differ from the ledger')
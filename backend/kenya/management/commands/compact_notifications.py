@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from kenya.caching import cache_is_shared
+from kenya.models import NotificationRecipient
+from kenya.retention import compact_global_notifications, compact_recipients, drop_orphaned_notifications
+
+
+class Command(BaseCommand):
+    help = 'Archive or delete read and expired notifications in small chunks, safe to run under live traffic'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--read-days', type=int, default=30,
+                            help='Read personal notifications older than this leave the inbox')
+        parser.add_argument('--expire-days', type=int, default=180,
+                            help='Personal notifications older than this leave the inbox, read or not')
+        parser.add_argument('--global-days', type=int, default=90,
+                            help='Global announcements older than this are compacted')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Rows per transaction')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Seconds to pause between chunks, to leave room for live traffic')
+        parser.add_argument('--delete', action='store_true',
+                            help='Delete instead of copying into NotificationArchive')
+
+    def handle(self, *args, **options):
+        # Compacting globals bumps GLOBAL_VERSION from this process; with a
+        # per-process cache the web processes would keep serving archived rows
+        if not cache_is_shared():
+            raise CommandError('compact_notifications needs a cache shared with the web processes; set REDIS_URL')
+
+        now = timezone.now()
+        chunk_size = options['chunk_size']
+        archive = not options['delete']
+        read_cutoff = now - timedelta(days=options['read_days'])
+
+        policy = NotificationRecipient.objects.filter(
+            Q(read_at__lt=read_cutoff) |
+            Q(created_at__lt=now - timedelta(days=options['expire_days']))
+        )
+        totals = {'recipient': [0, 0], 'personal notification': [0, 0], 'global notification': [0, 0]}
+
+        last_id = None
+        while True:
+            # Pick the next ids without locking; compact_recipients re-checks them under lock
+            candidates = policy.order_by('id')
+            if last_id is not None:
+                candidates = candidates.filter(id__gt=last_id)
+            ids = list(candidates.values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            self.add(totals['recipient'], compact_recipients(policy.filter(id__in=ids), archive))
+            last_id = ids[-1]
+            time.sleep(options['sleep'])
+
+        # Personal notifications whose recipients have all been compacted
+        while self.add(totals['personal notification'], drop_orphaned_notifications(read_cutoff, chunk_size)):
+            time.sleep(options['sleep'])
+
+        global_cutoff = now - timedelta(days=options['global_days'])
+        while self.add(totals['global notification'], compact_global_notifications(global_cutoff, chunk_size, archive)):
+            time.sleep(options['sleep'])
+
+        verb = 'Archived' if archive else 'Deleted'
+        for label, (rows, reclaimed) in totals.items():
+            # Orphaned personal notifications are already archived per recipient
+            done = 'Deleted' if label == 'personal notification' else verb
+            self.stdout.write(f'{done} {rows} {label} rows, about {reclaimed / 1024:.1f} KiB')
+        self.stdout.write(self.style.SUCCESS(
+            f'Reclaimed about {sum(reclaimed for _, reclaimed in totals.values()) / 1024:.1f} KiB from the live tables'
+        ))
+
+    def add(self, total, result):
+        rows, reclaimed = result
+        total[0] += rows
+        total[1] += reclaimed
+        return rows
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kenya.counters import recount_job_applications
+from kenya.feed import invalidate_feed
+from kenya.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Recompute Job.pending_applications_count and Job.applications_count from JobApplication rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Jobs checked per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        checked = repaired = 0
+        last_id = None
+
+        while True:
+            # Walk the table in primary-key order so each chunk is a short transaction
+            jobs = Job.objects.order_by('pk')
+            if last_id is not None:
+                jobs = jobs.filter(pk__gt=last_id)
+            ids = list(jobs.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+
+            with transaction.atomic():
+                repaired += recount_job_applications(Job.objects.filter(pk__in=ids))
+
+            checked += len(ids)
+            last_id = ids[-1]
+
+        if repaired:
+            invalidate_feed()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} jobs, repaired {repaired} with drifted counters'
+        ))
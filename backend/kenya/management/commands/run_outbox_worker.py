@@ -0,0 +1,94 @@
+import json
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from kenya.outbox import claim_batch, outbox_stats, process_event, purge_processed, runs_inline
+
+
+class Command(BaseCommand):
+    help = 'Carry out queued outbox events (notifications and other side effects of writes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Events processed concurrently')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stats-interval', type=float, default=60.0,
+                            help='Seconds between queue depth/lag reports')
+        parser.add_argument('--keep-days', type=int, default=7,
+                            help='Processed events older than this are purged')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain what is due now and exit')
+        parser.add_argument('--stats', action='store_true',
+                            help='Print queue depth and lag as JSON and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(outbox_stats()))
+            return
+
+        # Handlers bump cache versions and publish stream events from this
+        # process; with per-process backends the web processes never see them
+        if runs_inline():
+            raise CommandError('Without a shared cache and event broker the web processes carry out outbox '
+                               'events themselves; set REDIS_URL (or EVENTS_REDIS_URL) to run this worker')
+
+        stopping = threading.Event()
+        if not options['once']:
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, lambda *_: stopping.set())
+
+        self.processed = self.failed = 0
+        self.max_lag = 0.0
+        next_report = time.monotonic() + options['stats_interval']
+
+        with ThreadPoolExecutor(options['threads'], initializer=close_old_connections) as pool:
+            while not stopping.is_set():
+                events = claim_batch(options['batch_size'])
+                if events:
+                    for event, done in zip(events, pool.map(self.run_event, events)):
+                        if done:
+                            self.processed += 1
+                            self.max_lag = max(self.max_lag, (timezone.now() - event.created_at).total_seconds())
+                        else:
+                            self.failed += 1
+                elif options['once']:
+                    break
+                else:
+                    stopping.wait(options['poll_interval'])
+
+                if time.monotonic() >= next_report:
+                    self.report(options['keep_days'])
+                    next_report = time.monotonic() + options['stats_interval']
+
+        self.report(options['keep_days'])
+
+    def run_event(self, event):
+        try:
+            return process_event(event)
+        except Exception as e:
+            # Lost the database while recording the failure; the lease expires and it is retried
+            self.stderr.write(f'Outbox event {event.id} ({event.topic}) failed: {e}')
+            return False
+        finally:
+            # Pool threads hold their own connections; drop them if they went stale
+            close_old_connections()
+
+    def report(self, keep_days):
+        purged = purge_processed(timedelta(days=keep_days))
+        stats = outbox_stats()
+        self.stdout.write(
+            f"outbox depth={stats['depth']} lag={stats['lag_seconds']}s retrying={stats['retrying']} "
+            f"dead={stats['dead']} processed={self.processed} failed={self.failed} "
+            f"max_processing_lag={self.max_lag:.3f}s purged={purged}"
+        )
+        self.processed = self.failed = 0
+        self.max_lag = 0.0
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kenya.conditional import touch_users
+from kenya.counters import drifted_user_stats, recount_user_stats
+from kenya.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare UserStats with the jobs, applications, messages and transactions they summarize'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true',
+                            help='Rewrite drifted rows instead of only reporting them')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Users checked per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        checked = drifted = 0
+        last_id = None
+
+        while True:
+            # Walk the users in primary-key order so each chunk is a short transaction
+            users = User.objects.order_by('pk')
+            if last_id is not None:
+                users = users.filter(pk__gt=last_id)
+            ids = list(users.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+
+            with transaction.atomic():
+                found = list(drifted_user_stats(ids).values_list('pk', flat=True))
+                if found and options['repair']:
+                    recount_user_stats(found)
+                    touch_users(*found)
+
+            if not options['repair']:
+                for user_id in found:
+                    self.stdout.write(f'Drifted stats for user {user_id}')
+            drifted += len(found)
+            checked += len(ids)
+            last_id = ids[-1]
+
+        verb = 'repaired' if options['repair'] else 'found'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} users, {verb} {drifted} with drifted stats'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0002_rename_file_name_fileupload_original_filename_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='job_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:23
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX job_search_vector_idx ON kenya_job USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE kenya_job SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS kenya_job_fts "
+            "USING fts5(job_id UNINDEXED, title, description, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO kenya_job_fts (job_id, title, description) "
+            "SELECT id, title, description FROM kenya_job"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS job_search_vector_idx")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS kenya_job_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0003_job_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
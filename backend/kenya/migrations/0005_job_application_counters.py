@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:24
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Job = apps.get_model('kenya', 'Job')
+    JobApplication = apps.get_model('kenya', 'JobApplication')
+
+    def count(**filters):
+        applications = JobApplication.objects.filter(job=OuterRef('pk'), **filters)
+        return Coalesce(Subquery(
+            applications.order_by().values('job').annotate(total=Count('id')).values('total'),
+            output_field=IntegerField()
+        ), 0)
+
+    Job.objects.update(
+        pending_applications_count=count(status='pending'),
+        applications_count=count()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0004_job_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_applications_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', '-applications_count', '-created_at', '-id'], name='job_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
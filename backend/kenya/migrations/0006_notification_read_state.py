@@ -0,0 +1,86 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:30
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def create_notification_states(apps, schema_editor):
+    User = apps.get_model('kenya', 'User')
+    NotificationRecipient = apps.get_model('kenya', 'NotificationRecipient')
+    UserNotificationState = apps.get_model('kenya', 'UserNotificationState')
+
+    # Nothing was ever read per user before this migration
+    unread = dict(
+        NotificationRecipient.objects.values('user').annotate(total=Count('id')).values_list('user', 'total')
+    )
+    UserNotificationState.objects.bulk_create([
+        UserNotificationState(user_id=user_id, unread_count=unread.get(user_id, 0))
+        for user_id in User.objects.values_list('id', flat=True).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0005_job_application_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserNotificationState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_state', serialize=False, to='kenya.user')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('global_read_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GlobalNotificationRead',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('read_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='global_reads', to='kenya.notification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='kenya.user')),
+            ],
+        ),
+        # The implicit M2M table becomes NotificationRecipient without being rebuilt
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='NotificationRecipient',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='kenya.notification')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='kenya.user')),
+                    ],
+                    options={
+                        'db_table': 'kenya_notification_users',
+                        'unique_together': {('notification', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='notification',
+                    name='users',
+                    field=models.ManyToManyField(blank=True, related_name='notifications', through='kenya.NotificationRecipient', to='kenya.user'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notificationrecipient',
+            name='read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_global', '-created_at'], name='notification_global_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='globalnotificationread',
+            unique_together={('user', 'notification')},
+        ),
+        migrations.RunPython(create_notification_states, migrations.RunPython.noop),
+    ]
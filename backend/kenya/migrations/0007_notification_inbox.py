@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:34
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_created_at(apps, schema_editor):
+    Notification = apps.get_model('kenya', 'Notification')
+    NotificationRecipient = apps.get_model('kenya', 'NotificationRecipient')
+    NotificationRecipient.objects.update(created_at=Subquery(
+        Notification.objects.filter(pk=OuterRef('notification_id')).values('created_at')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0006_notification_read_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationrecipient',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notificationrecipient',
+            index=models.Index(fields=['user', '-created_at', '-notification'], name='notification_inbox_idx'),
+        ),
+    ]
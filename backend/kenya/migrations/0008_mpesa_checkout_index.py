@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0007_notification_inbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mpesapayment',
+            name='checkout_request_id',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
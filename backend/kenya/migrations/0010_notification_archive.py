@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0009_outbox_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_id', models.UUIDField()),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('notification_type', models.CharField(choices=[('announcement', 'Announcement'), ('withdrawal', 'Withdrawal'), ('signup', 'New Signup'), ('new_job', 'New Job'), ('job_application', 'Job Application'), ('job_accepted', 'Job Accepted'), ('job_completed', 'Job Completed'), ('milestone_completed', 'Milestone Completed'), ('payment_received', 'Payment Received'), ('review_received', 'Review Received'), ('message', 'New Message'), ('activation', 'Activation'), ('referral', 'Referral'), ('dispute', 'Dispute'), ('contract', 'Contract'), ('other', 'Other')], max_length=20)),
+                ('is_global', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='kenya.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='notification_archive_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:43
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def backfill_conversations(apps, schema_editor):
+    Message = apps.get_model('kenya', 'Message')
+    Conversation = apps.get_model('kenya', 'Conversation')
+
+    threads = set()
+    for sender_id, recipient_id, job_id in Message.objects.values_list('sender_id', 'recipient_id', 'job_id').distinct().iterator():
+        user_a, user_b = sorted([sender_id, recipient_id])
+        threads.add((user_a, user_b, job_id))
+
+    for user_a, user_b, job_id in threads:
+        messages = Message.objects.filter(
+            Q(sender_id=user_a, recipient_id=user_b) | Q(sender_id=user_b, recipient_id=user_a),
+            job_id=job_id
+        )
+        last = messages.order_by('-sent_at', '-id').first()
+        conversation = Conversation.objects.create(
+            user_a_id=user_a,
+            user_b_id=user_b,
+            job_id=job_id,
+            last_message=last,
+            last_sender_id=last.sender_id,
+            last_message_preview=last.content[:140],
+            last_message_at=last.sent_at,
+            unread_a=messages.filter(recipient_id=user_a, is_read=False).count(),
+            unread_b=messages.filter(recipient_id=user_b, is_read=False).count(),
+            created_at=messages.order_by('sent_at').values_list('sent_at', flat=True).first()
+        )
+        messages.update(conversation=conversation)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0010_notification_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('last_message_preview', models.CharField(blank=True, max_length=255)),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('unread_a', models.PositiveIntegerField(default=0)),
+                ('unread_b', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='kenya.job')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kenya.message')),
+                ('last_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kenya.user')),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_a', to='kenya.user')),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_b', to='kenya.user')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='kenya.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', '-sent_at', '-id'], name='message_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_a', '-last_message_at', '-id'], name='conversation_inbox_a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_b', '-last_message_at', '-id'], name='conversation_inbox_b_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('job__isnull', False)), fields=('user_a', 'user_b', 'job'), name='conversation_job_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('job__isnull', True)), fields=('user_a', 'user_b'), name='conversation_direct_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.CheckConstraint(condition=models.Q(('user_a__lte', models.F('user_b'))), name='conversation_ordered_users'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
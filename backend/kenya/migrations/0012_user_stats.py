@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:48
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def create_user_stats(apps, schema_editor):
+    User = apps.get_model('kenya', 'User')
+    Job = apps.get_model('kenya', 'Job')
+    JobApplication = apps.get_model('kenya', 'JobApplication')
+    Message = apps.get_model('kenya', 'Message')
+    WalletTransaction = apps.get_model('kenya', 'WalletTransaction')
+    UserStats = apps.get_model('kenya', 'UserStats')
+
+    def per_user(queryset, field):
+        return Counter(dict(queryset.values(field).annotate(total=Count('pk')).values_list(field, 'total')))
+
+    def jobs(status):
+        own = per_user(Job.objects.filter(status=status, assigned_freelancer=F('client')), 'client')
+        return per_user(Job.objects.filter(status=status), 'client') + per_user(Job.objects.filter(status=status), 'assigned_freelancer') - own
+
+    completed = jobs('completed')
+    in_progress = jobs('in_progress')
+    assigned = per_user(Job.objects.filter(status='in_progress'), 'assigned_freelancer')
+    pending = per_user(JobApplication.objects.filter(status='pending'), 'freelancer')
+    unread = per_user(Message.objects.filter(is_read=False), 'recipient')
+    referral = dict(
+        WalletTransaction.objects.filter(transaction_type='referral_bonus', wallet_type='referral')
+        .values('user').annotate(total=Sum('amount')).values_list('user', 'total')
+    )
+
+    UserStats.objects.bulk_create([
+        UserStats(
+            user_id=user_id,
+            completed_jobs=completed[user_id],
+            in_progress_jobs=in_progress[user_id],
+            assigned_jobs=assigned[user_id],
+            pending_applications=pending[user_id],
+            unread_messages=unread[user_id],
+            referral_earnings=referral.get(user_id) or 0
+        )
+        for user_id in User.objects.values_list('id', flat=True).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0011_conversations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='kenya.user')),
+                ('completed_jobs', models.PositiveIntegerField(default=0)),
+                ('in_progress_jobs', models.PositiveIntegerField(default=0)),
+                ('assigned_jobs', models.PositiveIntegerField(default=0)),
+                ('pending_applications', models.PositiveIntegerField(default=0)),
+                ('unread_messages', models.PositiveIntegerField(default=0)),
+                ('referral_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_user_stats, migrations.RunPython.noop),
+    ]
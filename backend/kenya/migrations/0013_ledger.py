@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:51
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0012_user_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerAccount',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('earnings', 'Earnings Wallet'), ('referral', 'Referral Wallet'), ('escrow', 'Client Funds'), ('platform', 'Platform'), ('opening', 'Opening Balances')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_accounts', to='kenya.user')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.BigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('as_of', models.DateTimeField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='kenya.ledgeraccount')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('journal_id', models.UUIDField(db_index=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('entry_type', models.CharField(choices=[('activation_fee', 'Activation Fee'), ('referral_bonus', 'Referral Bonus'), ('job_payment', 'Job Payment'), ('milestone_payment', 'Milestone Payment'), ('withdrawal', 'Withdrawal'), ('admin_adjustment', 'Admin Adjustment'), ('dispute_refund', 'Dispute Refund'), ('other', 'Other')], max_length=50)),
+                ('description', models.TextField(blank=True)),
+                ('reference', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='kenya.ledgeraccount')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ledgeraccount',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'kind'), name='ledger_user_account_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgeraccount',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('kind',), name='ledger_system_account_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='balancecheckpoint',
+            index=models.Index(fields=['account', '-as_of'], name='ledger_checkpoint_as_of_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='balancecheckpoint',
+            constraint=models.UniqueConstraint(fields=('account', 'entry_id'), name='ledger_checkpoint_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account', 'id'], name='ledger_account_tail_idx'),
+        ),
+    ]
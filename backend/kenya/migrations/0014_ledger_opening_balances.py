@@ -0,0 +1,41 @@
+import uuid
+
+from django.db import migrations
+from django.db.models import Q
+from django.utils import timezone
+
+
+def post_opening_balances(apps, schema_editor):
+    User = apps.get_model('kenya', 'User')
+    LedgerAccount = apps.get_model('kenya', 'LedgerAccount')
+    LedgerEntry = apps.get_model('kenya', 'LedgerEntry')
+
+    # Wallets as they stand become one journal each against the opening account
+    opening, _ = LedgerAccount.objects.get_or_create(user=None, kind='opening')
+    now = timezone.now()
+    users = User.objects.exclude(Q(earnings_wallet=0) & Q(referral_wallet=0)).only('earnings_wallet', 'referral_wallet')
+    for user in users.iterator():
+        entries = []
+        for kind, amount in (('earnings', user.earnings_wallet), ('referral', user.referral_wallet)):
+            if not amount:
+                continue
+            account, _ = LedgerAccount.objects.get_or_create(user=user, kind=kind)
+            journal_id = uuid.uuid4()
+            entries += [
+                LedgerEntry(journal_id=journal_id, account=opening, amount=-amount, entry_type='other',
+                            description='Opening balance', created_at=now),
+                LedgerEntry(journal_id=journal_id, account=account, amount=amount, entry_type='other',
+                            description='Opening balance', created_at=now),
+            ]
+        LedgerEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0013_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(post_opening_balances, migrations.RunPython.noop),
+    ]
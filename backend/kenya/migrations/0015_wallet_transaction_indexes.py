@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kenya', '0014_ledger_opening_balances'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='wallet_txn_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['created_at', 'id'], name='wallet_txn_created_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 import uuid
 
@@ -108,6 +110,19 @@ class Job(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by kenya.counters; repair with `manage.py repair_job_counters`
+    pending_applications_count = models.PositiveIntegerField(default=0)
+    applications_count = models.PositiveIntegerField(default=0)
+    # Weighted title/description tsvector, GIN-indexed on PostgreSQL (see search.index_job)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination of the public job feed
+            models.Index(fields=['status', '-created_at', '-id'], name='job_feed_idx'),
+            # Feed sorted by popularity
+            models.Index(fields=['status', '-applications_count', '-created_at', '-id'], name='job_popularity_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.client.email}"
@@ -314,7 +329,7 @@ class MpesaPayment(models.Model):
     mpesa_transaction_id = models.CharField(max_length=255, blank=True, null=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
-    checkout_request_id = models.CharField(max_length=255)
+    checkout_request_id = models.CharField(max_length=255, db_index=True)  # Safaricom's CheckoutRequestID
     merchant_request_id = models.CharField(max_length=255)
     phone_number = models.CharField(max_length=20)
     description = models.TextField(blank=True, null=True)
@@ -346,6 +361,14 @@ class WalletTransaction(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     reference = models.CharField(max_length=255, blank=True, null=True)
     
+    class Meta:
+        indexes = [
+            # A user's history pages and exports
+            models.Index(fields=['user', '-created_at', '-id'], name='wallet_txn_user_idx'),
+            # Platform-wide exports, oldest first
+            models.Index(fields=['created_at', 'id'], name='wallet_txn_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.transaction_type} - {self.user.email}"
 
@@ -393,16 +416,115 @@ class Notification(models.Model):
     title = models.CharField(max_length=255)
     message = models.TextField()
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPE_CHOICES)
-    users = models.ManyToManyField(User, blank=True, related_name='notifications')
+    users = models.ManyToManyField(User, blank=True, related_name='notifications', through='NotificationRecipient')
     is_global = models.BooleanField(default=False)  # If True, sent to all users
     created_at = models.DateTimeField(default=timezone.now)
+    # Legacy flag shared by every recipient; per-user read state lives in
+    # NotificationRecipient.read_at and GlobalNotificationRead
     is_read = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_global', '-created_at'], name='notification_global_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.notification_type} - {self.title}"
 
+class NotificationRecipient(models.Model):
+    # Explicit through model over the table the plain M2M used to create
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)  # Copy of notification.created_at, for the inbox index
+    
+    class Meta:
+        db_table = 'kenya_notification_users'
+        unique_together = ('notification', 'user')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-notification'], name='notification_inbox_idx'),
+        ]
+
+class GlobalNotificationRead(models.Model):
+    # Global announcements have no recipient rows; a row here marks one read for one user
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='global_reads')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    read_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        unique_together = ('user', 'notification')
+
+class UserNotificationState(models.Model):
+    # Maintained by kenya.notifications so badges never count rows
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_state')
+    unread_count = models.PositiveIntegerField(default=0)  # Personal notifications not yet read
+    global_read_count = models.PositiveIntegerField(default=0)  # Global announcements read
+    updated_at = models.DateTimeField(auto_now=True)
+
+class UserStats(models.Model):
+    # Dashboard totals maintained by kenya.counters; verify_user_stats finds and repairs drift
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    completed_jobs = models.PositiveIntegerField(default=0)  # As client or assigned freelancer
+    in_progress_jobs = models.PositiveIntegerField(default=0)  # As client or assigned freelancer
+    assigned_jobs = models.PositiveIntegerField(default=0)  # In progress with this user as the freelancer
+    pending_applications = models.PositiveIntegerField(default=0)
+    unread_messages = models.PositiveIntegerField(default=0)
+    referral_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class NotificationArchive(models.Model):
+    # Notifications moved out of the live tables by compact_notifications, one row per
+    # recipient for personal notifications and one row per announcement for global ones
+    notification_id = models.UUIDField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPE_CHOICES)
+    is_global = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_archive_user_idx'),
+        ]
+
+class Conversation(models.Model):
+    # One thread per participant pair and optional job; user_a is always the lower id
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_a = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_a')
+    user_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_b')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True)
+    
+    # Snapshot of the newest message, so the inbox never reads Message
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_preview = models.CharField(max_length=255, blank=True)
+    last_message_at = models.DateTimeField(default=timezone.now)
+    
+    unread_a = models.PositiveIntegerField(default=0)  # Messages user_a has not read
+    unread_b = models.PositiveIntegerField(default=0)  # Messages user_b has not read
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_a', 'user_b', 'job'], condition=models.Q(job__isnull=False), name='conversation_job_unique'),
+            models.UniqueConstraint(fields=['user_a', 'user_b'], condition=models.Q(job__isnull=True), name='conversation_direct_unique'),
+            models.CheckConstraint(condition=models.Q(user_a__lte=models.F('user_b')), name='conversation_ordered_users'),
+        ]
+        indexes = [
+            models.Index(fields=['user_a', '-last_message_at', '-id'], name='conversation_inbox_a_idx'),
+            models.Index(fields=['user_b', '-last_message_at', '-id'], name='conversation_inbox_b_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Conversation {self.user_a_id} / {self.user_b_id}"
+
 class Message(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True, related_name='messages', db_index=False)  # Indexed by message_thread_idx
     job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True)  # Optional job context
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
@@ -412,5 +534,95 @@ class Message(models.Model):
     read_at = models.DateTimeField(null=True, blank=True)
     is_read = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', '-sent_at', '-id'], name='message_thread_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Message from {self.sender.email} to {self.recipient.email}"
+
+class OutboxEvent(models.Model):
+    # Side effects of a write, committed with it and carried out by run_outbox_worker
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)  # Not claimed before this (lease or retry backoff)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at', 'id'], name='outbox_pending_idx', condition=models.Q(processed_at__isnull=True)),
+        ]
+    
+    def __str__(self):
+        return f"{self.topic} #{self.id}"
+
+class LedgerAccount(models.Model):
+    # A user's wallet, or one of the platform's own accounts when user is empty
+    KIND_CHOICES = [
+        ('earnings', 'Earnings Wallet'),
+        ('referral', 'Referral Wallet'),
+        ('escrow', 'Client Funds'),
+        ('platform', 'Platform'),
+        ('opening', 'Opening Balances'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.PROTECT, null=True, blank=True, related_name='ledger_accounts')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind'], condition=models.Q(user__isnull=False), name='ledger_user_account_unique'),
+            models.UniqueConstraint(fields=['kind'], condition=models.Q(user__isnull=True), name='ledger_system_account_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} - {self.user.email if self.user else 'platform'}"
+
+class LedgerEntry(models.Model):
+    # Append-only; the entries of one journal_id sum to zero. The id orders entries for checkpoints
+    journal_id = models.UUIDField(db_index=True)
+    account = models.ForeignKey(LedgerAccount, on_delete=models.PROTECT, related_name='entries')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)  # Positive adds to the account's balance
+    entry_type = models.CharField(max_length=50, choices=WalletTransaction.TRANSACTION_TYPE_CHOICES)
+    description = models.TextField(blank=True)
+    reference = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            # Tail scans after a checkpoint, and statements
+            models.Index(fields=['account', 'id'], name='ledger_account_tail_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Ledger entries are append-only; post a correcting journal instead')
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.entry_type} {self.amount} ({self.journal_id})"
+
+class BalanceCheckpoint(models.Model):
+    # Balance of account after every entry up to entry_id; written by checkpoint_ledger
+    account = models.ForeignKey(LedgerAccount, on_delete=models.CASCADE, related_name='checkpoints')
+    entry_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    as_of = models.DateTimeField()  # Newest created_at among the covered entries
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'entry_id'], name='ledger_checkpoint_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['account', '-as_of'], name='ledger_checkpoint_as_of_idx'),
+        ]
+    
     def __str__(self):
-        return f"Message from {self.sender.email} to {self.recipient.email}"
\ No newline at end of file
+        return f"{self.account} = {self.balance} at #{self.entry_id}"
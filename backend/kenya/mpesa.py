@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Transient answers worth another GET; anything else goes straight back
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Refresh this many seconds before Safaricom's expiry, so a token handed out
+# never dies on the way to the API
+TOKEN_REFRESH_MARGIN = 60
+TOKEN_CACHE_KEY = 'mpesa:access-token'
+TOKEN_LOCK_KEY = 'mpesa:access-token:lock'
+# How long one worker may hold the shared refresh lock, and how long the others
+# wait on it before fetching a token themselves
+TOKEN_LOCK_TIMEOUT = 10
+TOKEN_LOCK_WAIT = 5
+
+
+class MpesaClient:
+    """One pooled, keep-alive session for every Daraja call in the process.
+
+    Each call gets the MPESA_CONNECT_TIMEOUT/MPESA_READ_TIMEOUT pair, so a slow
+    Safaricom response can't pin a worker. GETs are retried up to
+    MPESA_MAX_RETRIES times with jittered exponential backoff; POSTs only when
+    the connection itself failed, since an STK push that reached Safaricom
+    must never be sent twice. Per-operation latency lands in stats and the
+    kenya.mpesa log.
+    """
+
+    def __init__(self, base_url=None, timeout=None, retries=None, pool_size=10):
+        self.base_url = base_url or settings.MPESA_BASE_URL
+        self.timeout = timeout or (settings.MPESA_CONNECT_TIMEOUT, settings.MPESA_READ_TIMEOUT)
+        retries = settings.MPESA_MAX_RETRIES if retries is None else retries
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=Retry(
+            total=retries,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False
+        ))
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._stats_lock = threading.Lock()
+        self.stats = {}
+
+    def _record(self, operation, status, seconds):
+        with self._stats_lock:
+            entry = self.stats.setdefault(operation, {'calls': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            entry['calls'] += 1
+            entry['total_seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            if status == 'error' or status >= 400:
+                entry['errors'] += 1
+        logger.info('mpesa %s status=%s duration_ms=%.1f', operation, status, seconds * 1000)
+
+    def request(self, operation, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        except requests.RequestException:
+            self._record(operation, 'error', time.perf_counter() - start)
+            raise
+        self._record(operation, response.status_code, time.perf_counter() - start)
+        return response
+
+
+client = MpesaClient()
+
+
+def fetch_access_token():
+    """(token, expires_at) straight from the Daraja OAuth endpoint."""
+    response = client.request(
+        'oauth', 'GET', '/oauth/v1/generate',
+        params={'grant_type': 'client_credentials'},
+        auth=HTTPBasicAuth(settings.MPESA_CONSUMER_KEY, settings.MPESA_CONSUMER_SECRET)
+    )
+    response.raise_for_status()
+    result = response.json()
+    return result['access_token'], time.time() + int(result.get('expires_in', 3599))
+
+
+def _fresh(current):
+    return current is not None and time.time() < current[1] - TOKEN_REFRESH_MARGIN
+
+
+class TokenManager:
+    """Process-wide Daraja access token, refreshed shortly before it expires.
+
+    Only one thread per process refreshes at a time; the rest wait on the lock
+    and reuse its result. With shared set (MPESA_SHARE_TOKEN), the token also
+    lives in the cache backend and a cache.add lock lets one worker fetch it
+    for all of them.
+    """
+
+    def __init__(self, fetch=fetch_access_token, shared=None):
+        self._fetch = fetch
+        self._shared = shared
+        self._lock = threading.Lock()
+        # (token, expires_at), replaced as a whole so readers need no lock
+        self._current = None
+
+    @property
+    def shared(self):
+        return settings.MPESA_SHARE_TOKEN if self._shared is None else self._shared
+
+    def get(self):
+        current = self._current
+        if _fresh(current):
+            return current[0]
+        with self._lock:
+            current = self._current
+            if not _fresh(current):
+                current = self._current = self._refresh()
+            return current[0]
+
+    def invalidate(self, token=None):
+        """Drop token (or whatever is cached) after Safaricom rejects it."""
+        with self._lock:
+            if self._current is not None and token in (None, self._current[0]):
+                self._current = None
+            if self.shared:
+                cached = cache.get(TOKEN_CACHE_KEY)
+                if cached is not None and token in (None, cached[0]):
+                    cache.delete(TOKEN_CACHE_KEY)
+
+    def _refresh(self):
+        if not self.shared:
+            return self._fetch()
+        deadline = time.monotonic() + TOKEN_LOCK_WAIT
+        while True:
+            cached = cache.get(TOKEN_CACHE_KEY)
+            if _fresh(cached):
+                return tuple(cached)
+            if cache.add(TOKEN_LOCK_KEY, 1, TOKEN_LOCK_TIMEOUT):
+                try:
+                    current = self._fetch()
+                    cache.set(TOKEN_CACHE_KEY, current, max(int(current[1] - time.time()), 1))
+                    return current
+                finally:
+                    cache.delete(TOKEN_LOCK_KEY)
+            if time.monotonic() > deadline:
+                # The lock holder is stuck or gone; don't hold this request hostage
+                return self._fetch()
+            time.sleep(0.1)
+
+
+tokens = TokenManager()
+
+
+def get_access_token():
+    return tokens.get()
+
+
+def stk_push(payload):
+    """Send an STK push request; returns Safaricom's JSON answer."""
+    access_token = get_access_token()
+    response = client.request('stk_push', 'POST', '/mpesa/stkpush/v1/processrequest', json=payload,
+                              headers={'Authorization': f'Bearer {access_token}'})
+    if response.status_code == 401:
+        # Revoked or rotated early on Safaricom's side; fetch a new one and retry once
+        tokens.invalidate(access_token)
+        response = client.request('stk_push', 'POST', '/mpesa/stkpush/v1/processrequest', json=payload,
+                                  headers={'Authorization': f'Bearer {get_access_token()}'})
+    return response.json()
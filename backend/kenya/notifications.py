@@ -0,0 +1,330 @@
+from datetime import datetime
+from uuid import UUID
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .caching import bump_version_on_commit, get_version
+from .events import GLOBAL_CHANNEL, JOBS_CHANNEL, publish
+from .models import GlobalNotificationRead, Job, Notification, NotificationRecipient, User, UserNotificationState
+from .outbox import enqueue
+from .pagination import DEFAULT_PAGE_SIZE, InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+from .serializers import serialize_notification
+
+FAN_OUT_CHUNK_SIZE = 5000
+# Bumped whenever a global announcement is created, or staff edit notifications
+GLOBAL_VERSION = 'notifications:global'
+# Newest global announcements kept in the cache; older pages read notification_global_idx
+GLOBAL_CACHE_SIZE = 200
+# Upper bound on staleness if a bump never reaches this process; normally entries go stale on the next bump
+GLOBAL_CACHE_TIMEOUT = 60
+GLOBAL_FIELDS = ('id', 'title', 'message', 'notification_type', 'created_at')
+
+
+def matching_freelancers(skill_ids):
+    """Ids of activated, available freelancers with any of skill_ids, as a values('id') queryset."""
+    return User.objects.filter(
+        user_skills__skill_id__in=skill_ids,
+        is_activated=True,
+        is_available=True
+    ).values('id').distinct()
+
+
+def _ensure_states(user_ids):
+    UserNotificationState.objects.bulk_create(
+        [UserNotificationState(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True
+    )
+
+
+def _count_unread(user_ids):
+    # .update() skips auto_now, and updated_at is what the overview validator watches
+    return UserNotificationState.objects.filter(user_id__in=user_ids).update(
+        unread_count=F('unread_count') + 1, updated_at=timezone.now()
+    )
+
+
+def deliver(users, title, message, notification_type):
+    """Create a personal notification for users (instances or ids) and count it as unread."""
+    user_ids = {getattr(user, 'pk', user) for user in users if user}
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            title=title,
+            message=message,
+            notification_type=notification_type
+        )
+        NotificationRecipient.objects.bulk_create([
+            NotificationRecipient(notification=notification, user_id=user_id, created_at=notification.created_at)
+            for user_id in user_ids
+        ])
+        _ensure_states(user_ids)
+        _count_unread(user_ids)
+    data = serialize_notification(notification)
+    for user_id in user_ids:
+        publish(f'user:{user_id}', 'notification', data)
+    return notification
+
+
+def announce(title, message, notification_type='announcement'):
+    """Create a global notification, seen by every user without any per-user rows."""
+    notification = Notification.objects.create(
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        is_global=True
+    )
+    bump_version_on_commit(GLOBAL_VERSION)
+    publish(GLOBAL_CHANNEL, 'notification', serialize_notification(notification))
+    return notification
+
+
+def deliver_later(users, title, message, notification_type):
+    """Queue deliver() on the outbox, in the caller's transaction."""
+    enqueue(
+        'notification.deliver',
+        users=[str(getattr(user, 'pk', user)) for user in users if user],
+        title=title,
+        message=message,
+        notification_type=notification_type
+    )
+
+
+def announce_later(title, message, notification_type='announcement'):
+    enqueue('notification.announce', title=title, message=message, notification_type=notification_type)
+
+
+def notify_matching_freelancers(job_id, skill_ids):
+    """Tell available freelancers with any of skill_ids about a new job."""
+    recipients = matching_freelancers(skill_ids)
+    if not skill_ids or not recipients.exists():
+        return
+    job = Job.objects.only('title').get(pk=job_id)
+    notification = Notification.objects.create(
+        title='New Job Available',
+        message=f'New job posted: {job.title}',
+        notification_type='new_job'
+    )
+    # Links are inserted straight from the matching query, not loaded into Python
+    fan_out(notification, recipients)
+    # One event for every open stream; each keeps it only if its user has a matching skill
+    publish(JOBS_CHANNEL, 'notification', serialize_notification(notification), skills=skill_ids)
+
+
+def global_notification_count():
+    key = f'notifications:global_count:{get_version(GLOBAL_VERSION)}'
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(is_global=True).count()
+        cache.set(key, count, GLOBAL_CACHE_TIMEOUT)
+    return count
+
+
+def unread_count(user):
+    """Unread personal plus global notifications: one primary-key lookup and a cached count.
+
+    The lookup is skipped when user was loaded with select_related('notification_state').
+    """
+    if User.notification_state.is_cached(user):
+        loaded = getattr(user, 'notification_state', None)
+        state = (loaded.unread_count, loaded.global_read_count) if loaded else (0, 0)
+    else:
+        state = UserNotificationState.objects.filter(user=user).values_list(
+            'unread_count', 'global_read_count'
+        ).first() or (0, 0)
+    return state[0] + max(global_notification_count() - state[1], 0)
+
+
+def _global_notifications():
+    return Notification.objects.filter(is_global=True).order_by('-created_at', '-id').values(*GLOBAL_FIELDS)
+
+
+def cached_global_notifications():
+    """The newest GLOBAL_CACHE_SIZE global announcements, newest first, as dicts."""
+    key = f'notifications:global_list:{get_version(GLOBAL_VERSION)}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(_global_notifications()[:GLOBAL_CACHE_SIZE])
+        cache.set(key, rows, GLOBAL_CACHE_TIMEOUT)
+    return rows
+
+
+def _global_page(after, limit):
+    cached = cached_global_notifications()
+    rows = cached
+    if after is not None:
+        rows = [row for row in cached if (row['created_at'], row['id']) < after]
+    if len(rows) > limit or len(cached) < GLOBAL_CACHE_SIZE:
+        return rows[:limit + 1]
+    # The page runs past the cached window
+    queryset = _global_notifications()
+    if after is not None:
+        queryset = queryset.filter(keyset_filter(('created_at', 'id'), after))
+    return list(queryset[:limit + 1])
+
+
+def _personal_page(user, after, limit):
+    queryset = NotificationRecipient.objects.filter(user=user).select_related('notification')
+    if after is not None:
+        queryset = queryset.filter(keyset_filter(('created_at', 'notification_id'), after))
+    return list(queryset.order_by('-created_at', '-notification_id')[:limit + 1])
+
+
+def _decode_inbox_cursor(cursor):
+    created_at, notification_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), UUID(notification_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def notification_inbox(user, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of user's notifications, newest first, with a cursor on (created_at, id).
+
+    The personal stream is read from notification_inbox_idx and merged in
+    memory with the cached global announcements, so no query ORs across the
+    M2M join. Returns {'notifications', 'next_cursor'}.
+    """
+    after = _decode_inbox_cursor(cursor) if cursor else None
+
+    merged = []
+    for recipient in _personal_page(user, after, limit):
+        notification = recipient.notification
+        notification.read_by_user = recipient.read_at is not None
+        merged.append(notification)
+    announcements = [Notification(is_global=True, **row) for row in _global_page(after, limit)]
+    merged.extend(announcements)
+    merged.sort(key=lambda notification: (notification.created_at, notification.id), reverse=True)
+
+    next_cursor = None
+    if len(merged) > limit:
+        merged = merged[:limit]
+        next_cursor = encode_cursor([merged[-1].created_at, merged[-1].id])
+
+    page_globals = [notification.id for notification in merged if notification.is_global]
+    if page_globals:
+        read = set(GlobalNotificationRead.objects.filter(
+            user=user, notification_id__in=page_globals
+        ).values_list('notification_id', flat=True))
+        for notification in announcements:
+            notification.read_by_user = notification.id in read
+
+    return {
+        'notifications': [serialize_notification(notification) for notification in merged],
+        'next_cursor': next_cursor
+    }
+
+
+def mark_read(user, notification_ids=None, before=None):
+    """Mark notification_ids (all of them when None) read for user; returns the new unread count.
+
+    before further limits it to notifications created at or before that
+    time. Personal rows are marked with a single UPDATE and announcements
+    with a single INSERT. The user's state row is locked for the duration,
+    so the counters move by exactly the number of rows whose read state changed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        _ensure_states([user.pk])
+        UserNotificationState.objects.select_for_update().get(user=user)
+
+        personal = NotificationRecipient.objects.filter(user=user, read_at__isnull=True)
+        announcements = Notification.objects.filter(is_global=True).exclude(global_reads__user=user)
+        if notification_ids is not None:
+            personal = personal.filter(notification_id__in=notification_ids)
+            announcements = announcements.filter(id__in=notification_ids)
+        if before is not None:
+            personal = personal.filter(created_at__lte=before)
+            announcements = announcements.filter(created_at__lte=before)
+
+        personal_read = personal.update(read_at=now)
+        global_reads = GlobalNotificationRead.objects.bulk_create([
+            GlobalNotificationRead(notification_id=notification_id, user=user, read_at=now)
+            for notification_id in announcements.values_list('id', flat=True)
+        ])
+        UserNotificationState.objects.filter(user=user).update(
+            unread_count=Greatest(F('unread_count') - personal_read, 0),
+            global_read_count=F('global_read_count') + len(global_reads),
+            updated_at=now
+        )
+    return unread_count(user)
+
+
+def _link_columns():
+    return (
+        NotificationRecipient._meta.db_table,
+        NotificationRecipient._meta.get_field('notification').column,
+        NotificationRecipient._meta.get_field('user').column,
+    )
+
+
+def fan_out(notification, recipients):
+    """Link notification to every user selected by recipients (a values('id') queryset).
+
+    Runs as a single INSERT ... SELECT, so the user ids never leave the
+    database; the recipients' unread counters are then bumped set-wise from
+    the new links. Returns the number of links created.
+    """
+    table, notification_column, user_column = _link_columns()
+    select_sql, params = recipients.order_by().query.sql_with_params()
+    notification_id = Notification._meta.pk.get_db_prep_value(notification.pk, connection)
+    created_at = connection.ops.adapt_datetimefield_value(notification.created_at)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({notification_column}, {user_column}, created_at) '
+                f'SELECT %s, recipients.id, %s FROM ({select_sql}) recipients',
+                [notification_id, created_at, *params]
+            )
+            created = cursor.rowcount
+        _count_links_unread(notification)
+    return created
+
+
+def _count_links_unread(notification):
+    state = UserNotificationState._meta.db_table
+    table, notification_column, user_column = _link_columns()
+    notification_id = Notification._meta.pk.get_db_prep_value(notification.pk, connection)
+    with connection.cursor() as cursor:
+        # State rows for recipients that never had one, again without leaving the database.
+        # Rows a concurrent deliver() or fan-out creates first are skipped, as with
+        # _ensure_states' ignore_conflicts, instead of failing the whole delivery
+        cursor.execute(
+            f'{connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)} '
+            f'{state} (user_id, unread_count, global_read_count, updated_at) '
+            f'SELECT links.{user_column}, 0, 0, %s FROM {table} links '
+            f'WHERE links.{notification_column} = %s '
+            f'{connection.ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)}',
+            [connection.ops.adapt_datetimefield_value(timezone.now()), notification_id]
+        )
+    _count_unread(NotificationRecipient.objects.filter(notification=notification).values('user_id'))
+
+
+def fan_out_in_chunks(notification, recipients, chunk_size=FAN_OUT_CHUNK_SIZE):
+    """Same as fan_out, streaming id chunks through bulk_create on the link table.
+
+    For backends or statements where INSERT ... SELECT is not an option. Ids
+    are read in primary-key keyset chunks, so memory stays flat.
+    """
+    created = 0
+    last_id = None
+    while True:
+        chunk = recipients.order_by('id')
+        if last_id is not None:
+            chunk = chunk.filter(id__gt=last_id)
+        user_ids = list(chunk.values_list('id', flat=True)[:chunk_size])
+        if not user_ids:
+            return created
+        with transaction.atomic():
+            NotificationRecipient.objects.bulk_create([
+                NotificationRecipient(notification_id=notification.pk, user_id=user_id, created_at=notification.created_at)
+                for user_id in user_ids
+            ], batch_size=chunk_size)
+            _ensure_states(user_ids)
+            _count_unread(user_ids)
+        created += len(user_ids)
+        last_id = user_ids[-1]
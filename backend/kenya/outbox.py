@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .caching import cache_is_shared
+from .events import broker_is_shared
+from .models import OutboxEvent
+
+# topic -> dotted path of the function that carries it out; it is called with
+# the payload as keyword arguments, inside a transaction that also marks the
+# event processed
+HANDLERS = {
+    'notification.deliver': 'kenya.notifications.deliver',
+    'notification.announce': 'kenya.notifications.announce',
+    'notification.new_job': 'kenya.notifications.notify_matching_freelancers',
+}
+
+# Seconds a claimed event stays invisible to other workers
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 10
+MAX_BACKOFF_SECONDS = 600
+# Events a web process carries out after each commit when no worker can run
+INLINE_BATCH_SIZE = 100
+
+
+def runs_inline():
+    """Whether the web processes carry out events themselves instead of run_outbox_worker.
+
+    Handlers bump cache versions and publish stream events, which only reach
+    the web processes from another process through a shared cache and
+    broker. Without them (no REDIS_URL, the default) the worker can't run,
+    and each web process drains the outbox once the enqueuing transaction
+    commits.
+    """
+    return not (cache_is_shared() and broker_is_shared())
+
+
+def enqueue(topic, **payload):
+    """Record a side effect in the caller's transaction; it is carried out after commit."""
+    if topic not in HANDLERS:
+        raise ValueError(f'No outbox handler for {topic}')
+    event = OutboxEvent.objects.create(topic=topic, payload=payload)
+    if runs_inline():
+        # The write has committed by then, so a failing drain is logged rather than raised;
+        # its events back off as usual and the next commit's drain retries them
+        transaction.on_commit(drain, robust=True)
+    return event
+
+
+def _pending():
+    return OutboxEvent.objects.filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS)
+
+
+def claim_batch(limit):
+    """Lease up to limit due events to this worker and return them, oldest first.
+
+    Claimed rows are pushed LEASE_SECONDS into the future, so a worker that
+    dies mid-batch only delays its events. Where the database supports it the
+    claim skips rows another worker is claiming instead of waiting on them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = _pending().filter(available_at__lte=now).order_by('available_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        events = list(due[:limit])
+        if events:
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                available_at=now + timedelta(seconds=LEASE_SECONDS)
+            )
+    return events
+
+
+def process_event(event):
+    """Run one claimed event; returns True when it was carried out (or already had been).
+
+    The handler's writes and the processed mark commit together, so an event
+    re-claimed after its lease expired is skipped rather than run twice.
+    """
+    handler = import_string(HANDLERS[event.topic])
+    try:
+        with transaction.atomic():
+            marked = OutboxEvent.objects.filter(id=event.id, processed_at__isnull=True).update(
+                processed_at=timezone.now(), attempts=event.attempts + 1
+            )
+            if marked:
+                handler(**event.payload)
+        return True
+    except Exception as e:
+        attempts = event.attempts + 1
+        OutboxEvent.objects.filter(id=event.id).update(
+            attempts=attempts,
+            available_at=timezone.now() + timedelta(seconds=min(2 ** attempts, MAX_BACKOFF_SECONDS)),
+            last_error=f'{type(e).__name__}: {e}'
+        )
+        return False
+
+
+def drain(limit=INLINE_BATCH_SIZE):
+    """Carry out up to limit due events in this process; returns how many were carried out."""
+    return sum(process_event(event) for event in claim_batch(limit))
+
+
+def outbox_stats():
+    """Queue depth and lag, for the worker's periodic report and monitoring."""
+    now = timezone.now()
+    stats = OutboxEvent.objects.filter(processed_at__isnull=True).aggregate(
+        depth=Count('id', filter=Q(attempts__lt=MAX_ATTEMPTS)),
+        retrying=Count('id', filter=Q(attempts__gt=0, attempts__lt=MAX_ATTEMPTS)),
+        dead=Count('id', filter=Q(attempts__gte=MAX_ATTEMPTS)),
+        oldest=Min('created_at', filter=Q(attempts__lt=MAX_ATTEMPTS)),
+    )
+    oldest = stats.pop('oldest')
+    stats['lag_seconds'] = round((now - oldest).total_seconds(), 3) if oldest else 0.0
+    return stats
+
+
+def purge_processed(older_than, limit=1000):
+    """Delete up to limit processed events older than older_than; returns the number deleted."""
+    ids = list(
+        OutboxEvent.objects.filter(processed_at__lt=timezone.now() - older_than)
+        .order_by('id').values_list('id', flat=True)[:limit]
+    )
+    if not ids:
+        return 0
+    return OutboxEvent.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _row_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def encode_cursor(values):
+    """Pack the keyset values of the last row into an opaque, URL-safe token."""
+    raw = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor('Invalid limit')
+    return max(1, min(limit, maximum))
+
+
+def keyset_filter(fields, values, descending=True):
+    # (a, b, c) < (x, y, z) expanded into ORs so it works on every backend; > when ascending.
+    # The planner can't turn the ORs into an index range, so a <= x is ANDed in
+    # front as the seek bound and the ORs only trim rows that share it.
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    equal = Q()
+    for field, value in zip(fields, values):
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return Q(**{f'{fields[0]}__{lookup}e': values[0]}) & condition
+
+
+def keyset_page(queryset, fields, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Return (rows, next_cursor) for queryset ordered descending on fields.
+
+    The last field must be unique (normally the primary key) so every row has
+    a stable position regardless of how many rows share the leading values.
+    """
+    if cursor:
+        try:
+            queryset = queryset.filter(keyset_filter(fields, decode_cursor(cursor, len(fields))))
+        except (ValidationError, ValueError, TypeError):
+            # Well-formed JSON whose values don't fit the ordering fields
+            raise InvalidCursor('Invalid cursor')
+
+    rows = list(queryset.order_by(*[f'-{field}' for field in fields])[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([_row_value(rows[-1], field) for field in fields])
+    return rows, next_cursor
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+from django.utils import timezone
+
+from .models import Job, JobApplication, UserSkill
+from .serializers import serialize_job, with_job_relations
+
+# Newest open jobs considered per request; scoring is vectorized over all of them
+CANDIDATE_LIMIT = 2000
+RECENCY_HALF_LIFE_DAYS = 7
+# Jobs that list no skills are neither a match nor a mismatch
+NO_SKILLS_SCORE = 0.25
+
+WEIGHTS = np.array([
+    0.5,   # skill overlap
+    0.2,   # budget fit
+    0.15,  # client rating
+    0.15,  # recency
+])
+
+
+def _skill_weights(user_skills):
+    # Proficiency (1-5) scaled by experience, saturating at 10 years: 0.1 .. 1.0
+    proficiency = np.array([skill.proficiency_level for skill in user_skills], dtype=float)
+    years = np.array([skill.years_experience for skill in user_skills], dtype=float)
+    return (proficiency / 5) * (0.5 + 0.5 * np.clip(years, 0, 10) / 10)
+
+
+def _target_budget(freelancer, target_budget):
+    if target_budget:
+        return float(target_budget)
+    # Otherwise the freelancer's typical fixed-price bid
+    bids = JobApplication.objects.filter(
+        freelancer=freelancer, fixed_price__isnull=False
+    ).values_list('fixed_price', flat=True)[:100]
+    bids = [float(bid) for bid in bids]
+    return float(np.median(bids)) if bids else None
+
+
+def recommend_jobs(freelancer, limit=20, target_budget=None):
+    """Rank open jobs for a freelancer, best first.
+
+    Returns serialized jobs with a `score` in [0, 1]. Candidates are the newest
+    CANDIDATE_LIMIT open jobs the freelancer has not applied to; the features
+    of all of them are scored at once with NumPy.
+    """
+    candidates = list(
+        Job.objects.filter(status='posted', client__is_activated=True)
+        .exclude(client=freelancer)
+        .exclude(applications__freelancer=freelancer)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'budget_min', 'budget_max', 'client__rating', 'created_at')[:CANDIDATE_LIMIT]
+    )
+    if not candidates:
+        return []
+
+    job_ids = [row[0] for row in candidates]
+    job_index = {job_id: i for i, job_id in enumerate(job_ids)}
+    n = len(job_ids)
+
+    user_skills = list(UserSkill.objects.filter(user=freelancer))
+    skill_index = {user_skill.skill_id: i for i, user_skill in enumerate(user_skills)}
+
+    # Job x skill incidence for the freelancer's skills, plus skills required per job
+    links = Job.skills_required.through.objects.filter(
+        job_id__in=job_ids
+    ).values_list('job_id', 'skill_id')
+    link_rows = []
+    link_cols = []
+    for job_id, skill_id in links:
+        link_rows.append(job_index[job_id])
+        link_cols.append(skill_index.get(skill_id, -1))
+    link_rows = np.array(link_rows, dtype=np.intp)
+    link_cols = np.array(link_cols, dtype=np.intp)
+
+    required = np.bincount(link_rows, minlength=n).astype(float)
+    incidence = np.zeros((n, max(len(user_skills), 1)))
+    matched = link_cols >= 0
+    incidence[link_rows[matched], link_cols[matched]] = 1
+    skill_score = np.zeros(n)
+    if user_skills:
+        skill_score = (incidence @ _skill_weights(user_skills)) / np.maximum(required, 1)
+    skill_score = np.where(required == 0, NO_SKILLS_SCORE, skill_score)
+
+    budget_min = np.array([float(row[1]) for row in candidates])
+    budget_max = np.array([float(row[2]) for row in candidates])
+    target = _target_budget(freelancer, target_budget)
+    if target:
+        midpoint = np.maximum((budget_min + budget_max) / 2, 1)
+        # 1.0 when the budget matches the target, halving roughly per 2x away
+        budget_score = np.exp(-np.abs(np.log(midpoint / max(target, 1))))
+    else:
+        budget_score = np.full(n, 0.5)
+
+    client_score = np.array([float(row[3]) for row in candidates]) / 5
+
+    now = timezone.now()
+    age_days = np.array([(now - row[4]).total_seconds() / 86400 for row in candidates])
+    recency_score = np.exp(-np.maximum(age_days, 0) * math.log(2) / RECENCY_HALF_LIFE_DAYS)
+
+    scores = np.column_stack([skill_score, budget_score, client_score, recency_score]) @ WEIGHTS
+
+    # Partial sort: only the top `limit` need ordering
+    top = np.argpartition(-scores, min(limit, n) - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind='stable')]
+
+    jobs = with_job_relations(Job.objects.filter(id__in=[job_ids[i] for i in top])).in_bulk()
+    results = []
+    for i in top:
+        job = jobs.get(job_ids[i])
+        if job is None:
+            continue
+        data = serialize_job(job)
+        data['score'] = round(float(scores[i]), 4)
+        results.append(data)
+    return results
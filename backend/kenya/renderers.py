@@ -0,0 +1,51 @@
+import msgpack
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+
+COLUMNAR_MEDIA_TYPE = 'application/vnd.kenya.columnar+json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+RESPONSE_FORMATS = ('json', 'columnar', 'msgpack')
+
+
+def response_format(request):
+    """Pick the list encoding from ?format= first, then the Accept header; plain JSON by default."""
+    requested = request.GET.get('format')
+    if requested in RESPONSE_FORMATS:
+        return requested
+    accept = request.META.get('HTTP_ACCEPT', '')
+    if MSGPACK_MEDIA_TYPE in accept or 'application/x-msgpack' in accept:
+        return 'msgpack'
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return 'columnar'
+    return 'json'
+
+
+def to_columns(rows):
+    # Key names once, then one positional array per row
+    if not rows:
+        return {'columns': [], 'rows': []}
+    columns = list(rows[0])
+    return {
+        'columns': columns,
+        'rows': [[row[column] for column in columns] for row in rows]
+    }
+
+
+def list_response(request, key, rows, **extra):
+    """Render a list endpoint in the negotiated format.
+
+    rows are the dicts produced by kenya.serializers, so JSON, columnar JSON
+    and MessagePack (always columnar) share one serialization path. extra
+    holds top-level fields such as next_cursor.
+    """
+    fmt = response_format(request)
+    if fmt == 'json':
+        response = JsonResponse({key: rows, **extra})
+    else:
+        payload = {key: to_columns(rows), **extra}
+        if fmt == 'msgpack':
+            response = HttpResponse(msgpack.packb(payload, use_bin_type=True), content_type=MSGPACK_MEDIA_TYPE)
+        else:
+            response = JsonResponse(payload, content_type=COLUMNAR_MEDIA_TYPE)
+    patch_vary_headers(response, ['Accept'])
+    return response
@@ -0,0 +1,136 @@
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .caching import bump_version_on_commit
+from .models import GlobalNotificationRead, Notification, NotificationArchive, NotificationRecipient, UserNotificationState
+from .notifications import GLOBAL_VERSION
+
+# Rough per-row sizes (tuple header, fixed-width columns, index entries) for the
+# reclaimed-bytes estimate; text columns are added at their encoded length
+NOTIFICATION_ROW_BYTES = 120
+RECIPIENT_ROW_BYTES = 90
+GLOBAL_READ_ROW_BYTES = 100
+
+
+def _text_bytes(notification):
+    return len(notification.title.encode()) + len(notification.message.encode())
+
+
+def _locked(queryset):
+    # Rows a request is updating right now are left for the next run
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True)
+    return queryset.select_for_update()
+
+
+def _adjust_states(field, per_user):
+    # One UPDATE per distinct amount rather than one per user
+    by_amount = defaultdict(list)
+    for user_id, amount in per_user.items():
+        by_amount[amount].append(user_id)
+    now = timezone.now()
+    for amount, user_ids in by_amount.items():
+        UserNotificationState.objects.filter(user_id__in=user_ids).update(
+            **{field: Greatest(F(field) - amount, 0)}, updated_at=now
+        )
+
+
+def compact_recipients(candidates, archive=True):
+    """Archive (or drop) the recipient rows among candidates; returns (rows, bytes).
+
+    candidates is a NotificationRecipient queryset already restricted to the
+    retention policy. Rows are locked for the transaction, so a concurrent
+    mark-read either lands first and is seen here or waits for the delete.
+    Unread rows leaving the inbox are taken off their user's unread_count.
+    """
+    with transaction.atomic():
+        recipients = list(_locked(candidates).order_by('id'))
+        if not recipients:
+            return 0, 0
+        notifications = Notification.objects.only('title', 'message', 'notification_type', 'created_at').in_bulk(
+            {recipient.notification_id for recipient in recipients}
+        )
+
+        if archive:
+            NotificationArchive.objects.bulk_create([
+                NotificationArchive(
+                    notification_id=recipient.notification_id,
+                    user_id=recipient.user_id,
+                    title=notifications[recipient.notification_id].title,
+                    message=notifications[recipient.notification_id].message,
+                    notification_type=notifications[recipient.notification_id].notification_type,
+                    created_at=recipient.created_at,
+                    read_at=recipient.read_at
+                )
+                for recipient in recipients
+            ])
+
+        NotificationRecipient.objects.filter(id__in=[recipient.id for recipient in recipients]).delete()
+
+        unread = Counter(recipient.user_id for recipient in recipients if recipient.read_at is None)
+        # Every affected user gets a touched state row, which moves their inbox ETag
+        _adjust_states('unread_count', {
+            recipient.user_id: unread.get(recipient.user_id, 0) for recipient in recipients
+        })
+
+    return len(recipients), len(recipients) * RECIPIENT_ROW_BYTES
+
+
+def drop_orphaned_notifications(older_than, limit):
+    """Delete personal notifications left with no recipients; returns (rows, bytes).
+
+    Only rows created before older_than are considered, so a notification
+    whose recipients are still being inserted is never taken.
+    """
+    with transaction.atomic():
+        orphans = list(_locked(
+            Notification.objects.filter(is_global=False, created_at__lt=older_than).exclude(
+                Exists(NotificationRecipient.objects.filter(notification=OuterRef('pk')))
+            ).only('title', 'message').order_by('created_at', 'id')[:limit]
+        ))
+        if not orphans:
+            return 0, 0
+        Notification.objects.filter(id__in=[notification.id for notification in orphans]).delete()
+    return len(orphans), sum(NOTIFICATION_ROW_BYTES + _text_bytes(notification) for notification in orphans)
+
+
+def compact_global_notifications(older_than, limit, archive=True):
+    """Archive (or drop) global announcements created before older_than; returns (rows, bytes).
+
+    The per-user read rows go with them, and each reader's global_read_count
+    drops by the announcements they had read, so unread counts stay exact.
+    """
+    with transaction.atomic():
+        announcements = list(_locked(
+            Notification.objects.filter(is_global=True, created_at__lt=older_than).order_by('created_at', 'id')[:limit]
+        ))
+        if not announcements:
+            return 0, 0
+        ids = [notification.id for notification in announcements]
+
+        if archive:
+            NotificationArchive.objects.bulk_create([
+                NotificationArchive(
+                    notification_id=notification.id,
+                    title=notification.title,
+                    message=notification.message,
+                    notification_type=notification.notification_type,
+                    is_global=True,
+                    created_at=notification.created_at
+                )
+                for notification in announcements
+            ])
+
+        reads = Counter(GlobalNotificationRead.objects.filter(notification_id__in=ids).values_list('user_id', flat=True))
+        GlobalNotificationRead.objects.filter(notification_id__in=ids).delete()
+        Notification.objects.filter(id__in=ids).delete()
+        _adjust_states('global_read_count', reads)
+        # Cached global lists and counts, and every inbox ETag, go stale
+        bump_version_on_commit(GLOBAL_VERSION)
+
+    reclaimed = sum(NOTIFICATION_ROW_BYTES + _text_bytes(notification) for notification in announcements)
+    return len(announcements), reclaimed + sum(reads.values()) * GLOBAL_READ_ROW_BYTES
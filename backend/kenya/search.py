@@ -0,0 +1,113 @@
+import re
+import uuid
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Count, F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .models import Job
+
+SEARCH_CONFIG = 'english'
+# SQLite FTS5 table created by migration 0004 for local runs
+FTS_TABLE = 'kenya_job_fts'
+MAX_TERMS = 8
+
+# Ranked results are paged by (rank, created_at, id), best match first
+SEARCH_ORDERING = ('rank', 'created_at', 'id')
+
+SKILL_MATCH_MODES = ('all', 'any')
+
+
+def job_search_vector():
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def search_terms(search_term):
+    # Reduce free text to plain word tokens so nothing reaches the query parsers unescaped
+    return re.findall(r'\w+', search_term.lower())[:MAX_TERMS]
+
+
+def index_job(job):
+    """Refresh the full-text index entry for a single job."""
+    if connection.vendor == 'postgresql':
+        Job.objects.filter(pk=job.pk).update(search_vector=job_search_vector())
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE job_id = %s', [job.pk.hex])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (job_id, title, description) VALUES (%s, %s, %s)',
+                [job.pk.hex, job.title, job.description]
+            )
+
+
+def search_jobs(queryset, search_term):
+    """Restrict queryset to jobs matching every term (prefix match) and annotate `rank`.
+
+    Higher rank is a better match, so results can be paged with SEARCH_ORDERING.
+    """
+    terms = search_terms(search_term)
+    if not terms:
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG
+        )
+        # Cast to double precision so the rank survives the cursor round trip exactly
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        job_table = Job._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT job_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(
+            # bm25() is lower-is-better, negate it to match the Postgres ordering
+            rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.job_id = {job_table}.id',
+                (match,), output_field=FloatField()
+            )
+        )
+
+    # Any other backend: unranked substring match
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+def parse_skill_ids(value):
+    """Parse a comma-separated list of skill ids, dropping blanks and duplicates.
+
+    Raises ValueError for anything that is not a UUID.
+    """
+    skill_ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if part:
+            skill_id = uuid.UUID(part)
+            if skill_id not in skill_ids:
+                skill_ids.append(skill_id)
+    return skill_ids
+
+
+def filter_by_skills(queryset, skill_ids, match='all'):
+    """Restrict queryset to jobs requiring all (or any) of skill_ids.
+
+    Both modes compile to a single subquery over the job/skill link table, so
+    the plan does not grow with the number of skills.
+    """
+    links = Job.skills_required.through.objects.filter(skill_id__in=skill_ids)
+    if match == 'all':
+        # A job qualifies when it links to every requested skill
+        links = links.values('job_id').annotate(
+            matched=Count('skill_id')
+        ).filter(matched=len(skill_ids))
+    return queryset.filter(id__in=links.values('job_id'))
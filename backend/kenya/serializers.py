@@ -0,0 +1,99 @@
+from django.db.models import Prefetch
+
+from .models import Skill
+
+
+def skills_prefetch():
+    return Prefetch('skills_required', queryset=Skill.objects.only('id', 'name'))
+
+
+def with_job_relations(queryset):
+    """Load everything serialize_job touches in a constant number of queries.
+
+    One query for the jobs (category and client joined) and one for the
+    skills of the whole page. Applicant counts are stored on Job itself.
+    """
+    return queryset.select_related('category', 'client').prefetch_related(skills_prefetch())
+
+
+def serialize_skills(job):
+    return [
+        {'id': str(skill.id), 'name': skill.name}
+        for skill in job.skills_required.all()
+    ]
+
+
+def serialize_job(job):
+    return {
+        'id': str(job.id),
+        'title': job.title,
+        'description': job.description,
+        'category': job.category.name,
+        'client_name': job.client.full_name,
+        'client_rating': float(job.client.rating),
+        'budget_min': float(job.budget_min),
+        'budget_max': float(job.budget_max),
+        'payment_type': job.payment_type,
+        'estimated_hours': job.estimated_hours,
+        'duration': job.duration,
+        'is_urgent': job.is_urgent,
+        'created_at': job.created_at.isoformat(),
+        'applicants_count': job.pending_applications_count,
+        'total_applications': job.applications_count,
+        'skills_required': serialize_skills(job)
+    }
+
+
+def serialize_wallet_transaction(transaction):
+    return {
+        'id': str(transaction.id),
+        'transaction_type': transaction.transaction_type,
+        'amount': float(transaction.amount),
+        'wallet_type': transaction.wallet_type,
+        'description': transaction.description,
+        'created_at': transaction.created_at.isoformat(),
+        'reference': transaction.reference
+    }
+
+
+def serialize_message(msg):
+    return {
+        'id': str(msg.id),
+        'sender': msg.sender.full_name,
+        'sender_email': msg.sender.email,
+        'subject': msg.subject,
+        'content': msg.content,
+        'sent_at': msg.sent_at.isoformat(),
+        'is_read': msg.is_read,
+        'job_id': str(msg.job.id) if msg.job else None,
+        'job_title': msg.job.title if msg.job else None,
+        'conversation_id': str(msg.conversation_id) if msg.conversation_id else None
+    }
+
+
+def serialize_conversation(conversation, user):
+    other = conversation.user_b if conversation.user_a_id == user.pk else conversation.user_a
+    return {
+        'id': str(conversation.id),
+        'other_user_id': str(other.id),
+        'other_user_name': other.full_name,
+        'other_user_email': other.email,
+        'job_id': str(conversation.job.id) if conversation.job else None,
+        'job_title': conversation.job.title if conversation.job else None,
+        'last_message_preview': conversation.last_message_preview,
+        'last_sender_id': str(conversation.last_sender_id) if conversation.last_sender_id else None,
+        'last_message_at': conversation.last_message_at.isoformat(),
+        'unread_count': conversation.unread_a if conversation.user_a_id == user.pk else conversation.unread_b
+    }
+
+
+def serialize_notification(notification):
+    return {
+        'id': str(notification.id),
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.notification_type,
+        'created_at': notification.created_at.isoformat(),
+        # Per-user read state when set by notifications.notification_inbox
+        'is_read': getattr(notification, 'read_by_user', notification.is_read)
+    }
@@ -84,6 +84,30 @@ DATABASES = {
     }
 }
 
+# Cache: job feed pages and version counters. LocMemCache is per process, so set
+# REDIS_URL when running more than one worker to share pages and invalidations.
+# run_outbox_worker and compact_notifications refuse to run without it; outbox
+# events are then carried out by the web process after each commit instead.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},  # Oldest third is culled when full
+        }
+    }
+
+# Server-sent events (api/events/) are fanned out in-process unless Redis is
+# available, in which case every worker sees every event
+EVENTS_REDIS_URL = config('EVENTS_REDIS_URL', default=REDIS_URL)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -154,6 +178,16 @@ MPESA_CONSUMER_KEY = config('MPESA_CONSUMER_KEY')
 MPESA_CONSUMER_SECRET = config('MPESA_CONSUMER_SECRET')
 MPESA_SHORT_CODE = config('MPESA_SHORT_CODE')
 MPESA_CALLBACK_URL = config('MPESA_CALLBACK_URL')
+MPESA_PASSKEY = config('MPESA_PASSKEY', default='')
+MPESA_BASE_URL = config('MPESA_BASE_URL', default='https://sandbox.safaricom.co.ke')
+# Keep one Daraja access token in the cache for every worker; on by default
+# with Redis, since LocMemCache is per process anyway
+MPESA_SHARE_TOKEN = config('MPESA_SHARE_TOKEN', default=bool(REDIS_URL), cast=bool)
+# Seconds; Daraja calls that take longer fail instead of holding the worker
+MPESA_CONNECT_TIMEOUT = config('MPESA_CONNECT_TIMEOUT', default=3.05, cast=float)
+MPESA_READ_TIMEOUT = config('MPESA_READ_TIMEOUT', default=15, cast=float)
+# Extra attempts for GETs and failed connections; STK pushes are never resent
+MPESA_MAX_RETRIES = config('MPESA_MAX_RETRIES', default=2, cast=int)
 
 # Static files configuration (This section defines STATICFILES_DIRS)
 STATIC_URL = '/static/'
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import Job, JobCategory, NotificationRecipient, OutboxEvent, Skill, User
+from .pagination import encode_cursor
+
+
+class JobFeedQueryCountTests(TestCase):
+    """The job feed costs the same number of queries however many jobs it returns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.skills = [Skill.objects.create(name=f'Skill {i}') for i in range(3)]
+
+    def create_jobs(self, start, stop):
+        for i in range(start, stop):
+            client = User.objects.create(
+                firebase_uid=f'client-{i}',
+                email=f'client-{i}@example.com',
+                auth_method='email',
+                referral_code=f'CLIENT{i}',
+                full_name=f'Client {i}',
+                is_activated=True
+            )
+            job = Job.objects.create(
+                title=f'Job {i}',
+                description='Description',
+                category=JobCategory.objects.create(name=f'Category {i}'),
+                client=client,
+                budget_min=1000,
+                budget_max=5000,
+                payment_type='fixed'
+            )
+            job.skills_required.set(self.skills[:i % 3 + 1])
+
+    def count_feed_queries(self, params=None):
+        # A cached page costs no queries at all, so measure a cold build
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/get-jobs/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), len(response.json()['jobs'])
+
+    def test_feed_queries_do_not_grow_with_page_size(self):
+        self.create_jobs(0, 2)
+        small_queries, small_jobs = self.count_feed_queries()
+        self.create_jobs(2, 15)
+        large_queries, large_jobs = self.count_feed_queries()
+
+        self.assertEqual((small_jobs, large_jobs), (2, 15))
+        self.assertEqual(small_queries, large_queries)
+
+    def test_skill_filtered_feed_queries_do_not_grow_with_page_size(self):
+        params = {'skills_required': str(self.skills[0].id)}
+        self.create_jobs(0, 2)
+        small_queries, small_jobs = self.count_feed_queries(params)
+        self.create_jobs(2, 15)
+        large_queries, large_jobs = self.count_feed_queries(params)
+
+        self.assertEqual((small_jobs, large_jobs), (2, 15))
+        self.assertEqual(small_queries, large_queries)
+
+
+class MalformedCursorTests(TestCase):
+    """A cursor that decodes but doesn't fit the ordering fields is a 400, not a 500."""
+
+    # base64 of ["abc","def"]: the right shape, neither a timestamp nor an id
+    cursor = encode_cursor(['abc', 'def'])
+
+    def test_job_feed_rejects_malformed_cursor(self):
+        response = self.client.get('/api/get-jobs/', {'cursor': self.cursor})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+    def test_wallet_transactions_reject_malformed_cursor(self):
+        user = User.objects.create(
+            firebase_uid='wallet-user',
+            email='wallet-user@example.com',
+            auth_method='email',
+            referral_code='WALLET1'
+        )
+        response = self.client.get('/api/wallet-transactions/', {'user_id': str(user.id), 'cursor': self.cursor})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+
+# The defaults without REDIS_URL: a per-process cache and no shared event broker
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    EVENTS_REDIS_URL=''
+)
+class InlineOutboxTests(TestCase):
+    """Without a shared cache and broker, queued notifications are delivered by the web process."""
+
+    def create_user(self, name):
+        return User.objects.create(
+            firebase_uid=name,
+            email=f'{name}@example.com',
+            auth_method='email',
+            referral_code=name.upper(),
+            full_name=name.title()
+        )
+
+    def test_message_notification_reaches_recipient(self):
+        sender = self.create_user('sender')
+        recipient = self.create_user('recipient')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/send-message/', {
+                'sender_id': str(sender.id),
+                'recipient_id': str(recipient.id),
+                'content': 'Hello'
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertTrue(NotificationRecipient.objects.filter(
+            user=recipient, notification__notification_type='message'
+        ).exists())
+        response = self.client.get('/api/notifications/', {'user_id': str(recipient.id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([n['title'] for n in response.json()['notifications']], ['New Message'])
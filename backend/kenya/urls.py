@@ -9,6 +9,7 @@ urlpatterns = [
     path('api/verify-firebase-auth/', views.verify_firebase_auth, name='verify_firebase_auth'),
     path('api/complete-profile/', views.complete_profile, name='complete_profile'),
     path('api/initiate-activation/', views.initiate_activation, name='initiate_activation'),
+    path('api/activation-status/', views.get_activation_status, name='get_activation_status'),
     path('api/mpesa-webhook/', views.mpesa_webhook, name='mpesa_webhook'),
     path('api/overview/', views.get_overview, name='get_overview'),
     path('api/request-withdrawal/', views.request_withdrawal, name='request_withdrawal'),
@@ -16,10 +17,17 @@ urlpatterns = [
     path('api/search-user/', views.search_user, name='search_user'),
     path('api/send-message/', views.send_message, name='send_message'),
     path('api/get-messages/', views.get_messages, name='get_messages'),
+    path('api/conversations/', views.get_conversations, name='get_conversations'),
+    path('api/conversation-messages/', views.get_conversation_messages, name='get_conversation_messages'),
+    path('api/mark-messages-read/', views.mark_messages_read, name='mark_messages_read'),
     path('api/create-announcement/', views.create_announcement, name='create_announcement'),
     path('api/notifications/', views.get_notifications, name='get_notifications'),
+    path('api/events/', views.stream_events, name='stream_events'),
+    path('api/mark-notifications-read/', views.mark_notifications_read, name='mark_notifications_read'),
     path('api/create-job/', views.create_job, name='create_job'),
     path('api/get-jobs/', views.get_jobs, name='get_jobs'),
+    path('api/job-facets/', views.get_job_facets, name='get_job_facets'),
+    path('api/recommended-jobs/', views.get_recommended_jobs, name='get_recommended_jobs'),
     path('api/apply-to-job/', views.apply_to_job, name='apply_to_job'),
     path('api/accept-application/', views.accept_application, name='accept_application'),
     path('api/complete-job/', views.complete_job, name='complete_job'),
@@ -37,6 +45,8 @@ urlpatterns = [
     path('api/get-user-files/', views.get_user_files, name='get_user_files'),
     path('api/delete-file/', views.delete_file, name='delete_file'),
     path('api/wallet-transactions/', views.get_wallet_transactions, name='get_wallet_transactions'),
+    path('api/export-wallet-transactions/', views.export_wallet_transactions, name='export_wallet_transactions'),
+    path('api/wallet-balance/', views.get_wallet_balance, name='get_wallet_balance'),
     path('api/withdrawal-history/', views.get_withdrawal_history, name='get_withdrawal_history'),
     path('api/add-skill/', views.add_skill, name='add_skill'),
     path('api/add-portfolio-item/', views.add_portfolio_item, name='add_portfolio_item'),
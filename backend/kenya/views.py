@@ -1,24 +1,46 @@
+import base64
 import json
-import requests
 import jwt
 import hashlib
 import hmac
 from datetime import datetime, timedelta
+from decimal import Decimal
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from django.db import transaction
 from django.utils import timezone
-from django.db.models import Avg, Count, Sum, Q
+from django.utils.dateparse import parse_datetime
+from django.db.models import Avg, Count, Q
 from firebase_admin import auth
-from .models import User, MpesaPayment, WalletTransaction, WithdrawalRequest, Notification, Message, Job, JobApplication, JobCategory, Skill, UserSkill, Portfolio, Milestone, EscrowPayment, Review, TimeLog, Dispute, Contract, FileUpload
+from .models import User, UserStats, MpesaPayment, WalletTransaction, WithdrawalRequest, Message, Conversation, Job, JobApplication, JobCategory, Skill, UserSkill, Portfolio, Milestone, EscrowPayment, Review, TimeLog, Dispute, Contract, FileUpload
+from .conditional import jobs_etag, messages_etag, notifications_etag, touch_users, user_etag
+from .conversations import conversation_inbox, get_or_create_conversation, is_participant, mark_received_read, record_message, thread_page, unread_messages
+from .counters import adjust_user_stats, application_created, set_application_status, set_job_status
+from .events import event_stream, publish, subscription
+from .exports import EXPORT_FORMATS, InvalidExport, export_stream, filter_transactions, parse_export_filters
+from .feed import InvalidFilter, cached_feed, invalidate_feed, job_facets, job_feed_page, parse_feed_filters
+from .ledger import wallet_balances
+from .mpesa import stk_push
+from .notifications import announce, announce_later, deliver_later, mark_read, notification_inbox, unread_count
+from .outbox import enqueue
+from .pagination import InvalidCursor, keyset_page, parse_limit
+from .recommendations import recommend_jobs
+from .renderers import list_response
+from .search import index_job
+from .serializers import serialize_message, serialize_skills, serialize_wallet_transaction, skills_prefetch
+from .wallet import credit
 import uuid
 import os
 from django.core.files.storage import default_storage
 
+# Longest an activation status request is held open waiting for the M-Pesa callback
+ACTIVATION_WAIT_TIMEOUT = 25
+
 # Firebase token verification
 def verify_firebase_token(token):
     try:
@@ -36,28 +58,17 @@ def generate_referral_code():
         if not User.objects.filter(referral_code=code).exists():
             return code
 
-# M-Pesa integration functions
-def generate_access_token():
-    import base64
-    from requests.auth import HTTPBasicAuth
-    
-    consumer_key = settings.MPESA_CONSUMER_KEY
-    consumer_secret = settings.MPESA_CONSUMER_SECRET
-    api_url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
-    
-    r = requests.get(api_url, auth=HTTPBasicAuth(consumer_key, consumer_secret))
-    result = r.json()
-    return result['access_token']
+# ISO 8601 timestamp from a request body, as an aware datetime
+def parse_timestamp(value):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValidationError('Invalid timestamp')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
+# M-Pesa integration functions
 def initiate_mpesa_payment(phone_number, amount, user_id, description, job_id=None):
-    access_token = generate_access_token()
-    api_url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-    
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
-    
     timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
     password = f"{settings.MPESA_SHORT_CODE}{settings.MPESA_PASSKEY}{timestamp}"
     encoded_password = base64.b64encode(password.encode()).decode()
@@ -76,8 +87,7 @@ def initiate_mpesa_payment(phone_number, amount, user_id, description, job_id=No
         "TransactionDesc": description
     }
     
-    response = requests.post(api_url, json=payload, headers=headers)
-    return response.json()
+    return stk_push(payload)
 
 @csrf_exempt
 def verify_firebase_auth(request):
@@ -226,10 +236,15 @@ def initiate_activation(request):
             )
             
             if mpesa_response.get('ResponseCode') == '0':
+                # The callback and status lookups are keyed by Safaricom's ids, not ours
+                payment.checkout_request_id = mpesa_response['CheckoutRequestID']
+                payment.merchant_request_id = mpesa_response.get('MerchantRequestID', merchant_request_id)
+                payment.save(update_fields=['checkout_request_id', 'merchant_request_id'])
                 return JsonResponse({
                     'success': True,
                     'message': 'Payment initiated successfully',
-                    'CheckoutRequestID': checkout_request_id
+                    'CheckoutRequestID': payment.checkout_request_id,
+                    'checkout_request_id': payment.checkout_request_id
                 })
             else:
                 payment.status = 'failed'
@@ -262,53 +277,56 @@ def mpesa_webhook(request):
                 payment = MpesaPayment.objects.get(checkout_request_id=checkout_request_id)
                 
                 if result_code == 0:  # Success
-                    payment.status = 'completed'
-                    payment.completed_at = timezone.now()
-                    payment.mpesa_transaction_id = data['Body']['stkCallback']['CallbackMetadata']['Item'][1]['Value']  # Transaction ID
-                    payment.save()
-                    
-                    # Activate user
-                    user = payment.user
-                    user.is_activated = True
-                    user.save()
-                    
-                    # Process referral bonus if applicable
-                    if user.referred_by and user.referred_by.is_activated:
-                        # Credit referral bonus to referrer's referral wallet
-                        bonus_amount = 50.00  # KSh 50
-                        user.referred_by.referral_wallet += bonus_amount
-                        user.referred_by.save()
-                        
-                        # Record transaction
-                        WalletTransaction.objects.create(
-                            user=user.referred_by,
-                            transaction_type='referral_bonus',
-                            amount=bonus_amount,
-                            wallet_type='referral',
-                            description=f'Referral bonus from {user.email}',
-                            reference=f'REF_{user.id}'
+                    # Activation, bonus and their notifications commit together
+                    with transaction.atomic():
+                        # Safaricom re-delivers callbacks; only the first one to claim the payment acts on it
+                        claimed = MpesaPayment.objects.filter(pk=payment.pk, status='pending').update(
+                            status='completed',
+                            completed_at=timezone.now(),
+                            mpesa_transaction_id=data['Body']['stkCallback']['CallbackMetadata']['Item'][1]['Value']  # Transaction ID
                         )
+                        if not claimed:
+                            return JsonResponse({'Result': 'Success'})
+                        
+                        # Activate user; wallet columns are left to credit()/debit()
+                        user = payment.user
+                        user.is_activated = True
+                        user.save(update_fields=['is_activated', 'updated_at'])
                         
-                        # Create notification for referrer
-                        Notification.objects.create(
-                            title='Referral Bonus Received',
-                            message=f'You received KSh {bonus_amount} for referring {user.full_name}',
-                            notification_type='referral',
-                            users=[user.referred_by]
+                        # Process referral bonus if applicable
+                        if user.referred_by and user.referred_by.is_activated:
+                            # Credit referral bonus to referrer's referral wallet
+                            bonus_amount = Decimal('50.00')  # KSh 50
+                            credit(
+                                user.referred_by, 'referral', bonus_amount, 'referral_bonus',
+                                f'Referral bonus from {user.email}', reference=f'REF_{user.id}'
+                            )
+                            adjust_user_stats({user.referred_by_id: {'referral_earnings': bonus_amount}})
+                            
+                            # Create notification for referrer
+                            deliver_later(
+                                [user.referred_by],
+                                title='Referral Bonus Received',
+                                message=f'You received KSh {bonus_amount} for referring {user.full_name}',
+                                notification_type='referral'
+                            )
+                        
+                        # Create activation notification for user
+                        deliver_later(
+                            [user],
+                            title='Account Activated',
+                            message='Your account has been successfully activated',
+                            notification_type='activation'
                         )
-                    
-                    # Create activation notification for user
-                    Notification.objects.create(
-                        title='Account Activated',
-                        message='Your account has been successfully activated',
-                        notification_type='activation',
-                        users=[user]
-                    )
+                        
+                    # Wakes any activation status request waiting on this checkout
+                    publish(f'payment:{checkout_request_id}', 'payment', {'status': 'completed'})
                     
                     return JsonResponse({'Result': 'Success'})
                 else:
-                    payment.status = 'failed'
-                    payment.save()
+                    # A late failure never overturns a payment that already completed
+                    if MpesaPayment.objects.filter(pk=payment.pk, status='pending').update(status='failed'):
+                        publish(f'payment:{checkout_request_id}', 'payment', {'status': 'failed'})
                     return JsonResponse({'Result': 'Failed'})
             except MpesaPayment.DoesNotExist:
                 return JsonResponse({'Result': 'Payment not found'})
@@ -316,60 +334,73 @@ def mpesa_webhook(request):
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+async def _activation_status(checkout_request_id):
+    payment = await MpesaPayment.objects.filter(
+        checkout_request_id=checkout_request_id
+    ).order_by('-created_at').values('status', 'user__is_activated').afirst()
+    if payment is None:
+        raise MpesaPayment.DoesNotExist
+    return {
+        'checkout_request_id': checkout_request_id,
+        'status': payment['status'],
+        'is_activated': payment['user__is_activated']
+    }
+
+async def get_activation_status(request):
+    if request.method == 'GET':
+        try:
+            checkout_request_id = request.GET.get('checkout_request_id')
+            # Seconds to hold the request while the payment is pending
+            try:
+                timeout = min(float(request.GET.get('timeout', ACTIVATION_WAIT_TIMEOUT)), ACTIVATION_WAIT_TIMEOUT)
+            except ValueError:
+                return JsonResponse({'error': 'Invalid timeout'}, status=400)
+            
+            # Subscribe before reading so a callback landing in between is not missed
+            async with subscription(f'payment:{checkout_request_id}') as events:
+                status = await _activation_status(checkout_request_id)
+                if status['status'] == 'pending' and timeout > 0:
+                    try:
+                        await events.get(timeout)
+                        status = await _activation_status(checkout_request_id)
+                    except TimeoutError:
+                        pass  # Still pending; the client asks again
+            
+            return JsonResponse(status)
+        except MpesaPayment.DoesNotExist:
+            return JsonResponse({'error': 'Payment not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=user_etag)
 def get_overview(request):
     if request.method == 'GET':
         try:
             user_id = request.GET.get('user_id')
-            user = User.objects.get(id=user_id)
-            
-            # Calculate overview data
-            total_completed_jobs = Job.objects.filter(
-                Q(client=user) | Q(assigned_freelancer=user),
-                status='completed'
-            ).count()
-            
-            pending_jobs = Job.objects.filter(
-                Q(client=user) | Q(assigned_freelancer=user),
-                status='in_progress'
-            ).count()
-            
-            referral_earnings = WalletTransaction.objects.filter(
-                user=user, 
-                transaction_type='referral_bonus',
-                wallet_type='referral'
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            unread_messages = Message.objects.filter(
-                recipient=user, 
-                is_read=False
-            ).count()
-            
-            # Get user's job applications
-            pending_applications = JobApplication.objects.filter(
-                freelancer=user,
-                status='pending'
-            ).count()
-            
-            # Get assigned jobs
-            assigned_jobs = Job.objects.filter(
-                assigned_freelancer=user,
-                status='in_progress'
-            ).count()
+            # Counters are kept on UserStats by the write paths, so this is the only query
+            user = User.objects.select_related('stats', 'notification_state').get(id=user_id)
+            try:
+                stats = user.stats
+            except UserStats.DoesNotExist:
+                stats = UserStats(user=user)  # Nothing recorded for this user yet
             
             return JsonResponse({
                 'wallet_balance': float(user.earnings_wallet + user.referral_wallet),
                 'earnings_wallet': float(user.earnings_wallet),
                 'referral_wallet': float(user.referral_wallet),
-                'total_completed_jobs': total_completed_jobs,
-                'pending_jobs': pending_jobs,
-                'referral_earnings': float(referral_earnings),
-                'unread_messages': unread_messages,
+                'total_completed_jobs': stats.completed_jobs,
+                'pending_jobs': stats.in_progress_jobs,
+                'referral_earnings': float(stats.referral_earnings),
+                'unread_messages': stats.unread_messages,
+                'unread_notifications': unread_count(user),
                 'date_joined': user.created_at.isoformat(),
                 'is_activated': user.is_activated,
                 'rating': float(user.rating),
                 'total_reviews': user.total_reviews,
-                'pending_applications': pending_applications,
-                'assigned_jobs': assigned_jobs
+                'pending_applications': stats.pending_applications,
+                'assigned_jobs': stats.assigned_jobs
             })
         except User.DoesNotExist:
             return JsonResponse({'error': 'User not found'}, status=404)
@@ -413,20 +444,20 @@ def request_withdrawal(request):
             else:
                 return JsonResponse({'error': 'Invalid wallet type'}, status=400)
             
-            # Create withdrawal request
-            withdrawal = WithdrawalRequest.objects.create(
-                user=user,
-                amount=amount,
-                wallet_type=wallet_type
-            )
-            
-            # Create notification for admin
-            Notification.objects.create(
-                title='New Withdrawal Request',
-                message=f'User {user.email} requested withdrawal of KSh {amount}',
-                notification_type='withdrawal',
-                is_global=True  # This will be seen by admins
-            )
+            with transaction.atomic():
+                # Create withdrawal request
+                withdrawal = WithdrawalRequest.objects.create(
+                    user=user,
+                    amount=amount,
+                    wallet_type=wallet_type
+                )
+                
+                # Create notification for admin
+                announce_later(
+                    title='New Withdrawal Request',
+                    message=f'User {user.email} requested withdrawal of KSh {amount}',
+                    notification_type='withdrawal'
+                )
             
             return JsonResponse({
                 'success': True,
@@ -467,7 +498,7 @@ def update_profile(request):
             for field, value in updates.items():
                 setattr(user, field, value)
             
-            user.save()
+            user.save(update_fields=[*updates, 'updated_at'])
             
             return JsonResponse({
                 'success': True,
@@ -527,26 +558,33 @@ def send_message(request):
             if job_id:
                 job = Job.objects.get(id=job_id)
             
-            message = Message.objects.create(
-                sender=sender,
-                recipient=recipient,
-                subject=subject,
-                content=content,
-                job=job
-            )
-            
-            # Create notification for recipient
-            Notification.objects.create(
-                title='New Message',
-                message=f'You have a new message from {sender.full_name}',
-                notification_type='message',
-                users=[recipient]
-            )
+            with transaction.atomic():
+                conversation = get_or_create_conversation(sender, recipient, job)
+                message = Message.objects.create(
+                    conversation=conversation,
+                    sender=sender,
+                    recipient=recipient,
+                    subject=subject,
+                    content=content,
+                    job=job
+                )
+                record_message(message)
+                touch_users(recipient.id)
+                publish(f'user:{recipient.id}', 'message', serialize_message(message))
+                
+                # Create notification for recipient
+                deliver_later(
+                    [recipient],
+                    title='New Message',
+                    message=f'You have a new message from {sender.full_name}',
+                    notification_type='message'
+                )
             
             return JsonResponse({
                 'success': True,
                 'message': 'Message sent successfully',
-                'message_id': str(message.id)
+                'message_id': str(message.id),
+                'conversation_id': str(conversation.id)
             })
         except User.DoesNotExist:
             return JsonResponse({'error': 'Sender or recipient not found'}, status=404)
@@ -554,6 +592,8 @@ def send_message(request):
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=messages_etag)
 def get_messages(request):
     if request.method == 'GET':
         try:
@@ -561,21 +601,9 @@ def get_messages(request):
             user = User.objects.get(id=user_id)
             
             # Get messages sent to this user
-            received_messages = Message.objects.filter(recipient=user).order_by('-sent_at')
-            
-            messages_data = []
-            for msg in received_messages:
-                messages_data.append({
-                    'id': str(msg.id),
-                    'sender': msg.sender.full_name,
-                    'sender_email': msg.sender.email,
-                    'subject': msg.subject,
-                    'content': msg.content,
-                    'sent_at': msg.sent_at.isoformat(),
-                    'is_read': msg.is_read,
-                    'job_id': str(msg.job.id) if msg.job else None,
-                    'job_title': msg.job.title if msg.job else None
-                })
+            received_messages = Message.objects.filter(recipient=user).select_related('sender', 'job').order_by('-sent_at')
+            
+            messages_data = [serialize_message(msg) for msg in received_messages]
             
             return JsonResponse({
                 'messages': messages_data
@@ -586,6 +614,94 @@ def get_messages(request):
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+@csrf_exempt
+def mark_messages_read(request):
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            user = User.objects.get(id=data.get('user_id'))
+            conversation_id = data.get('conversation_id')  # All of a thread
+            message_ids = data.get('message_ids')  # Specific messages
+            before = data.get('before')  # ISO timestamp; messages sent up to it
+            
+            if message_ids is not None and not isinstance(message_ids, list):
+                return JsonResponse({'error': 'message_ids must be a list'}, status=400)
+            
+            conversation = None
+            try:
+                if conversation_id:
+                    conversation = Conversation.objects.get(id=conversation_id)
+                    if not is_participant(conversation, user):
+                        return JsonResponse({'error': 'Not a participant in this conversation'}, status=403)
+                if before is not None:
+                    before = parse_timestamp(before)
+                marked = mark_received_read(user, conversation, message_ids, before)
+            except ValidationError:
+                return JsonResponse({'error': 'Invalid ID or timestamp'}, status=400)
+            
+            if marked:
+                touch_users(user.id)
+            
+            return JsonResponse({
+                'success': True,
+                'marked': marked,
+                'unread_count': unread_messages(user)
+            })
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except Conversation.DoesNotExist:
+            return JsonResponse({'error': 'Conversation not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+@cache_control(private=True, no_cache=True)
+def get_conversations(request):
+    if request.method == 'GET':
+        try:
+            user_id = request.GET.get('user_id')
+            user = User.objects.get(id=user_id)
+            
+            cursor = request.GET.get('cursor')
+            limit = parse_limit(request.GET.get('limit'))
+            page = conversation_inbox(user, cursor, limit)
+            
+            return list_response(request, 'conversations', page['conversations'], next_cursor=page['next_cursor'])
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+@cache_control(private=True, no_cache=True)
+def get_conversation_messages(request):
+    if request.method == 'GET':
+        try:
+            user_id = request.GET.get('user_id')
+            conversation_id = request.GET.get('conversation_id')
+            user = User.objects.get(id=user_id)
+            conversation = Conversation.objects.get(id=conversation_id)
+            
+            if not is_participant(conversation, user):
+                return JsonResponse({'error': 'Not a participant in this conversation'}, status=403)
+            
+            cursor = request.GET.get('cursor')
+            limit = parse_limit(request.GET.get('limit'))
+            page = thread_page(conversation, cursor, limit)
+            
+            return list_response(request, 'messages', page['messages'], next_cursor=page['next_cursor'])
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except Conversation.DoesNotExist:
+            return JsonResponse({'error': 'Conversation not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
 @csrf_exempt
 def create_announcement(request):
     if request.method == 'POST':
@@ -595,11 +711,10 @@ def create_announcement(request):
             message = data.get('message')
             
             # Create global notification
-            notification = Notification.objects.create(
+            notification = announce(
                 title=title,
                 message=message,
-                notification_type='announcement',
-                is_global=True
+                notification_type='announcement'
             )
             
             return JsonResponse({
@@ -611,30 +726,75 @@ def create_announcement(request):
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=notifications_etag)
 def get_notifications(request):
     if request.method == 'GET':
         try:
             user_id = request.GET.get('user_id')
             user = User.objects.get(id=user_id)
             
-            # Get user-specific and global notifications
-            notifications = Notification.objects.filter(
-                Q(users=user) | Q(is_global=True)
-            ).order_by('-created_at')
-            
-            notifications_data = []
-            for notif in notifications:
-                notifications_data.append({
-                    'id': str(notif.id),
-                    'title': notif.title,
-                    'message': notif.message,
-                    'type': notif.notification_type,
-                    'created_at': notif.created_at.isoformat(),
-                    'is_read': notif.is_read
-                })
+            cursor = request.GET.get('cursor')  # Opaque token from a previous page's next_cursor
+            limit = parse_limit(request.GET.get('limit'))
+            
+            # User-specific notifications merged with the cached global ones
+            page = notification_inbox(user, cursor, limit)
+            
+            return list_response(
+                request, 'notifications', page['notifications'],
+                next_cursor=page['next_cursor'], unread_count=unread_count(user)
+            )
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+async def stream_events(request):
+    if request.method == 'GET':
+        try:
+            user_id = request.GET.get('user_id')
+            user = await User.objects.aget(id=user_id)
+            
+            # New-job events are filtered against the skills held when the stream opened
+            skill_ids = []
+            if user.is_activated and user.is_available:
+                skill_ids = [skill_id async for skill_id in UserSkill.objects.filter(user=user).values_list('skill_id', flat=True)]
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+        
+        response = StreamingHttpResponse(event_stream(user.id, skill_ids), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Stop nginx-style proxies from buffering the stream
+        return response
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+@csrf_exempt
+def mark_notifications_read(request):
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            user = User.objects.get(id=data.get('user_id'))
+            notification_ids = data.get('notification_ids')  # Omit to mark everything read
+            before = data.get('before')  # Optional ISO timestamp; only notifications created up to it
+            
+            if notification_ids is not None and not isinstance(notification_ids, list):
+                return JsonResponse({'error': 'notification_ids must be a list'}, status=400)
+            
+            try:
+                if before is not None:
+                    before = parse_timestamp(before)
+                unread = mark_read(user, notification_ids, before)
+            except ValidationError:
+                return JsonResponse({'error': 'Invalid notification ID or timestamp'}, status=400)
             
             return JsonResponse({
-                'notifications': notifications_data
+                'success': True,
+                'unread_count': unread
             })
         except User.DoesNotExist:
             return JsonResponse({'error': 'User not found'}, status=404)
@@ -666,39 +826,33 @@ def create_job(request):
             if not client.is_activated:
                 return JsonResponse({'error': 'Client account must be activated to post jobs'}, status=400)
             
-            # Create job
-            job = Job.objects.create(
-                title=title,
-                description=description,
-                category_id=category_id,
-                client=client,
-                budget_min=budget_min,
-                budget_max=budget_max,
-                payment_type=payment_type,
-                estimated_hours=estimated_hours,
-                duration=duration,
-                is_urgent=is_urgent
-            )
-            
-            # Add skills required
-            for skill_id in skills_required:
-                skill = Skill.objects.get(id=skill_id)
-                job.skills_required.add(skill)
-            
-            # Create notification for freelancers with matching skills
-            matching_freelancers = User.objects.filter(
-                user_skills__skill_id__in=skills_required,
-                is_activated=True,
-                is_available=True
-            ).distinct()
-            
-            if matching_freelancers.exists():
-                notification = Notification.objects.create(
-                    title='New Job Available',
-                    message=f'New job posted: {title}',
-                    notification_type='new_job'
+            with transaction.atomic():
+                # Create job
+                job = Job.objects.create(
+                    title=title,
+                    description=description,
+                    category_id=category_id,
+                    client=client,
+                    budget_min=budget_min,
+                    budget_max=budget_max,
+                    payment_type=payment_type,
+                    estimated_hours=estimated_hours,
+                    duration=duration,
+                    is_urgent=is_urgent
                 )
-                notification.users.set(matching_freelancers)
+                
+                # Add skills required
+                for skill_id in skills_required:
+                    skill = Skill.objects.get(id=skill_id)
+                    job.skills_required.add(skill)
+                
+                # Make the job searchable straight away
+                index_job(job)
+                invalidate_feed()
+                
+                # Freelancers with matching skills are notified by the outbox worker
+                if skills_required:
+                    enqueue('notification.new_job', job_id=job.id, skill_ids=skills_required)
             
             return JsonResponse({
                 'success': True,
@@ -711,64 +865,74 @@ def create_job(request):
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=jobs_etag)
 def get_jobs(request):
     if request.method == 'GET':
         try:
-            # Get filters
-            category_id = request.GET.get('category_id')
-            min_budget = request.GET.get('min_budget')
-            max_budget = request.GET.get('max_budget')
-            search_term = request.GET.get('search_term', '')
-            skills_required = request.GET.get('skills_required', '')  # Comma-separated skill IDs
-            
-            jobs = Job.objects.filter(status='posted', client__is_activated=True)
-            
-            if category_id:
-                jobs = jobs.filter(category_id=category_id)
+            # Filters: category_id, min_budget, max_budget, search_term,
+            # skills_required (comma-separated skill IDs), skills_match ('all'/'any'),
+            # sort ('newest'/'popular'; searches default to relevance)
+            filters = parse_feed_filters(request.GET)
+            cursor = request.GET.get('cursor')  # Opaque token from a previous page's next_cursor
+            limit = parse_limit(request.GET.get('limit'))
+            
+            def build_page():
+                return job_feed_page(filters, cursor, limit)
+            
+            if filters['search_term']:
+                # Search text is long-tail; caching it would only push hot pages out
+                payload = build_page()
+            else:
+                payload = cached_feed('page', dict(filters, cursor=cursor, limit=limit), build_page)
             
-            if min_budget:
-                jobs = jobs.filter(budget_max__gte=min_budget)
+            return list_response(request, 'jobs', payload['jobs'], next_cursor=payload['next_cursor'])
+        except (InvalidCursor, InvalidFilter) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+def get_job_facets(request):
+    if request.method == 'GET':
+        try:
+            # Same filters as get_jobs; counts describe the whole filtered feed, not one page
+            filters = parse_feed_filters(request.GET)
             
-            if max_budget:
-                jobs = jobs.filter(budget_min__lte=max_budget)
+            if filters['search_term']:
+                payload = job_facets(filters)
+            else:
+                payload = cached_feed('facets', filters, lambda: job_facets(filters))
             
-            if search_term:
-                jobs = jobs.filter(
-                    Q(title__icontains=search_term) | 
-                    Q(description__icontains=search_term)
-                )
+            return JsonResponse(payload)
+        except InvalidFilter as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+def get_recommended_jobs(request):
+    if request.method == 'GET':
+        try:
+            user_id = request.GET.get('user_id')
+            limit = parse_limit(request.GET.get('limit'))
+            target_budget = request.GET.get('target_budget')  # Optional, defaults to the freelancer's usual bid
             
-            if skills_required:
-                skill_ids = skills_required.split(',')
-                for skill_id in skill_ids:
-                    jobs = jobs.filter(skills_required__id=skill_id)
+            user = User.objects.get(id=user_id)
             
-            jobs_data = []
-            for job in jobs:
-                jobs_data.append({
-                    'id': str(job.id),
-                    'title': job.title,
-                    'description': job.description,
-                    'category': job.category.name,
-                    'client_name': job.client.full_name,
-                    'client_rating': float(job.client.rating),
-                    'budget_min': float(job.budget_min),
-                    'budget_max': float(job.budget_max),
-                    'payment_type': job.payment_type,
-                    'estimated_hours': job.estimated_hours,
-                    'duration': job.duration,
-                    'is_urgent': job.is_urgent,
-                    'created_at': job.created_at.isoformat(),
-                    'applicants_count': job.applications.filter(status='pending').count(),
-                    'skills_required': [
-                        {'id': str(skill.id), 'name': skill.name}
-                        for skill in job.skills_required.all()
-                    ]
-                })
+            if target_budget:
+                try:
+                    target_budget = float(target_budget)
+                except ValueError:
+                    return JsonResponse({'error': 'Invalid target budget'}, status=400)
             
             return JsonResponse({
-                'jobs': jobs_data
+                'jobs': recommend_jobs(user, limit, target_budget)
             })
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     return JsonResponse({'error': 'Method not allowed'}, status=405)
@@ -800,27 +964,32 @@ def apply_to_job(request):
             if existing_application:
                 return JsonResponse({'error': 'Already applied to this job'}, status=400)
             
-            # Create application
-            application = JobApplication.objects.create(
-                job=job,
-                freelancer=freelancer,
-                cover_letter=cover_letter,
-                hourly_rate=hourly_rate,
-                fixed_price=fixed_price
-            )
-            
-            # Add portfolio items
-            for portfolio_id in portfolio_ids:
-                portfolio = Portfolio.objects.get(id=portfolio_id)
-                application.portfolio_items.add(portfolio)
-            
-            # Create notification for client
-            Notification.objects.create(
-                title='New Job Application',
-                message=f'New application received for job: {job.title}',
-                notification_type='job_application',
-                users=[job.client]
-            )
+            with transaction.atomic():
+                # Create application
+                application = JobApplication.objects.create(
+                    job=job,
+                    freelancer=freelancer,
+                    cover_letter=cover_letter,
+                    hourly_rate=hourly_rate,
+                    fixed_price=fixed_price
+                )
+                application_created(job.id, freelancer.id)
+                # No feed bump: applications are the most frequent write, and cached
+                # pages may show applicant counts up to FEED_CACHE_TIMEOUT old
+                touch_users(freelancer.id)
+                
+                # Add portfolio items
+                for portfolio_id in portfolio_ids:
+                    portfolio = Portfolio.objects.get(id=portfolio_id)
+                    application.portfolio_items.add(portfolio)
+                
+                # Notification for client, sent by the outbox worker once this commits
+                deliver_later(
+                    [job.client_id],
+                    title='New Job Application',
+                    message=f'New application received for job: {job.title}',
+                    notification_type='job_application'
+                )
             
             return JsonResponse({
                 'success': True,
@@ -846,30 +1015,33 @@ def accept_application(request):
             application = JobApplication.objects.get(id=application_id)
             
             # Verify this client posted the job
-            if application.job.client.id != client_id:
+            if str(application.job.client_id) != client_id:
                 return JsonResponse({'error': 'Unauthorized'}, status=403)
             
             # Check if job already assigned
             if application.job.assigned_freelancer:
                 return JsonResponse({'error': 'Job already assigned'}, status=400)
             
-            # Accept the application
-            application.status = 'accepted'
-            application.save()
-            
-            # Assign freelancer to job
-            job = application.job
-            job.assigned_freelancer = application.freelancer
-            job.status = 'in_progress'
-            job.save()
-            
-            # Create notification for freelancer
-            Notification.objects.create(
-                title='Job Application Accepted',
-                message=f'Your application for job "{job.title}" has been accepted',
-                notification_type='job_accepted',
-                users=[application.freelancer]
-            )
+            with transaction.atomic():
+                # Accept the application
+                if not set_application_status(application, 'accepted'):
+                    return JsonResponse({'error': 'Application is no longer pending'}, status=400)
+                
+                # Assign freelancer to job
+                job = application.job
+                if not set_job_status(job, 'in_progress', assigned_freelancer=application.freelancer):
+                    transaction.set_rollback(True)
+                    return JsonResponse({'error': 'Job is no longer open'}, status=400)
+                invalidate_feed()
+                touch_users(job.client_id, job.assigned_freelancer_id)
+                
+                # Notification for freelancer
+                deliver_later(
+                    [application.freelancer_id],
+                    title='Job Application Accepted',
+                    message=f'Your application for job "{job.title}" has been accepted',
+                    notification_type='job_accepted'
+                )
             
             # Create contract
             Contract.objects.create(
@@ -906,37 +1078,29 @@ def complete_job(request):
             if str(job.client.id) != user_id and str(job.assigned_freelancer.id) != user_id:
                 return JsonResponse({'error': 'Unauthorized'}, status=403)
             
-            # Complete the job
-            job.status = 'completed'
-            job.completed_at = timezone.now()
-            job.save()
-            
-            # Process final payment (release from escrow or direct payment)
-            if final_amount:
-                # Add to freelancer's earnings wallet
-                freelancer = job.assigned_freelancer
-                freelancer.earnings_wallet += final_amount
-                freelancer.total_earnings += final_amount
-                freelancer.save()
+            with transaction.atomic():
+                # Complete the job
+                if not set_job_status(job, 'completed', completed_at=timezone.now()):
+                    return JsonResponse({'error': 'Job is already completed or has changed'}, status=400)
+                invalidate_feed()
+                touch_users(job.client_id, job.assigned_freelancer_id)
                 
-                # Record transaction
-                WalletTransaction.objects.create(
-                    user=freelancer,
-                    job=job,
-                    transaction_type='job_payment',
-                    amount=final_amount,
-                    wallet_type='earnings',
-                    description=f'Payment for job completion: {job.title}'
+                # Process final payment (release from escrow or direct payment)
+                if final_amount:
+                    # Add to freelancer's earnings wallet
+                    credit(
+                        job.assigned_freelancer_id, 'earnings', final_amount, 'job_payment',
+                        f'Payment for job completion: {job.title}', source='escrow', job=job, earned=True
+                    )
+                
+                # Create notification for both parties
+                deliver_later(
+                    [job.client, job.assigned_freelancer],
+                    title='Job Completed',
+                    message=f'Job "{job.title}" has been marked as completed',
+                    notification_type='job_completed'
                 )
             
-            # Create notification for both parties
-            Notification.objects.create(
-                title='Job Completed',
-                message=f'Job "{job.title}" has been marked as completed',
-                notification_type='job_completed',
-                users=[job.client, job.assigned_freelancer]
-            )
-            
             return JsonResponse({
                 'success': True,
                 'message': 'Job completed successfully'
@@ -982,6 +1146,8 @@ def add_skill(request):
                 user_skill.years_experience = years_experience
                 user_skill.save()
             
+            touch_users(user.id)
+            
             return JsonResponse({
                 'success': True,
                 'message': 'Skill added successfully',
@@ -1012,6 +1178,8 @@ def add_portfolio_item(request):
                 project_url=project_url
             )
             
+            touch_users(user.id)
+            
             return JsonResponse({
                 'success': True,
                 'message': 'Portfolio item added successfully',
@@ -1052,30 +1220,31 @@ def submit_review(request):
             if existing_review:
                 return JsonResponse({'error': 'Review already submitted for this job'}, status=400)
             
-            # Create review
-            review = Review.objects.create(
-                job=job,
-                reviewer=reviewer,
-                reviewee=reviewee,
-                review_type='client_to_freelancer' if job.client.id == reviewer.id else 'freelancer_to_client',
-                rating=rating,
-                comment=comment
-            )
-            
-            # Update reviewee's rating
-            reviews = Review.objects.filter(reviewee=reviewee)
-            avg_rating = reviews.aggregate(avg=Avg('rating'))['avg']
-            reviewee.rating = avg_rating or 0
-            reviewee.total_reviews = reviews.count()
-            reviewee.save()
-            
-            # Create notification for reviewee
-            Notification.objects.create(
-                title='New Review Received',
-                message=f'You received a {rating}-star review for job: {job.title}',
-                notification_type='review_received',
-                users=[reviewee]
-            )
+            with transaction.atomic():
+                # Create review
+                review = Review.objects.create(
+                    job=job,
+                    reviewer=reviewer,
+                    reviewee=reviewee,
+                    review_type='client_to_freelancer' if job.client.id == reviewer.id else 'freelancer_to_client',
+                    rating=rating,
+                    comment=comment
+                )
+                
+                # Update reviewee's rating
+                reviews = Review.objects.filter(reviewee=reviewee)
+                avg_rating = reviews.aggregate(avg=Avg('rating'))['avg']
+                reviewee.rating = avg_rating or 0
+                reviewee.total_reviews = reviews.count()
+                reviewee.save(update_fields=['rating', 'total_reviews', 'updated_at'])
+                
+                # Create notification for reviewee
+                deliver_later(
+                    [reviewee],
+                    title='New Review Received',
+                    message=f'You received a {rating}-star review for job: {job.title}',
+                    notification_type='review_received'
+                )
             
             return JsonResponse({
                 'success': True,
@@ -1150,46 +1319,37 @@ def complete_milestone(request):
             if str(milestone.job.client.id) != user_id and str(milestone.job.assigned_freelancer.id) != user_id:
                 return JsonResponse({'error': 'Unauthorized'}, status=403)
             
-            # Complete milestone
-            milestone.status = 'completed'
-            milestone.completed_at = timezone.now()
-            milestone.save()
-            
-            # Release payment from escrow
-            escrow = EscrowPayment.objects.filter(
-                milestone=milestone,
-                status='held'
-            ).first()
-            
-            if escrow:
-                escrow.status = 'released'
-                escrow.released_at = timezone.now()
-                escrow.save()
+            with transaction.atomic():
+                # Complete milestone
+                milestone.status = 'completed'
+                milestone.completed_at = timezone.now()
+                milestone.save()
                 
-                # Add to freelancer's earnings
-                freelancer = milestone.job.assigned_freelancer
-                freelancer.earnings_wallet += milestone.amount
-                freelancer.total_earnings += milestone.amount
-                freelancer.save()
+                # Release payment from escrow
+                escrow = EscrowPayment.objects.filter(
+                    milestone=milestone,
+                    status='held'
+                ).first()
+                
+                # Only the call that moves it out of 'held' pays; a concurrent one finds nothing to release
+                if escrow and EscrowPayment.objects.filter(pk=escrow.pk, status='held').update(
+                    status='released', released_at=timezone.now()
+                ):
+                    # Add to freelancer's earnings
+                    credit(
+                        milestone.job.assigned_freelancer_id, 'earnings', milestone.amount, 'milestone_payment',
+                        f'Milestone payment: {milestone.title}', source='escrow', job=milestone.job,
+                        reference=str(escrow.id), earned=True
+                    )
                 
-                # Record transaction
-                WalletTransaction.objects.create(
-                    user=freelancer,
-                    job=milestone.job,
-                    transaction_type='milestone_payment',
-                    amount=milestone.amount,
-                    wallet_type='earnings',
-                    description=f'Milestone payment: {milestone.title}'
+                # Create notification
+                deliver_later(
+                    [milestone.job.client, milestone.job.assigned_freelancer],
+                    title='Milestone Completed',
+                    message=f'Milestone "{milestone.title}" has been completed and payment released',
+                    notification_type='milestone_completed'
                 )
             
-            # Create notification
-            Notification.objects.create(
-                title='Milestone Completed',
-                message=f'Milestone "{milestone.title}" has been completed and payment released',
-                notification_type='milestone_completed',
-                users=[milestone.job.client, milestone.job.assigned_freelancer]
-            )
-            
             return JsonResponse({
                 'success': True,
                 'message': 'Milestone completed successfully'
@@ -1221,26 +1381,27 @@ def create_dispute(request):
             if not (job.client.id == raised_by.id or job.assigned_freelancer.id == raised_by.id):
                 return JsonResponse({'error': 'Unauthorized'}, status=403)
             
-            dispute = Dispute.objects.create(
-                job=job,
-                raised_by=raised_by,
-                against_user=against_user,
-                dispute_type=dispute_type,
-                title=title,
-                description=description
-            )
-            
-            # Update job status to disputed
-            job.status = 'disputed'
-            job.save()
-            
-            # Create notification for admins
-            Notification.objects.create(
-                title='New Dispute Filed',
-                message=f'Dispute filed: {title} for job {job.title}',
-                notification_type='dispute',
-                is_global=True
-            )
+            with transaction.atomic():
+                dispute = Dispute.objects.create(
+                    job=job,
+                    raised_by=raised_by,
+                    against_user=against_user,
+                    dispute_type=dispute_type,
+                    title=title,
+                    description=description
+                )
+                
+                # Update job status to disputed
+                set_job_status(job, 'disputed')
+                invalidate_feed()
+                touch_users(job.client_id, job.assigned_freelancer_id)
+                
+                # Create notification for admins
+                announce_later(
+                    title='New Dispute Filed',
+                    message=f'Dispute filed: {title} for job {job.title}',
+                    notification_type='dispute'
+                )
             
             return JsonResponse({
                 'success': True,
@@ -1256,6 +1417,8 @@ def create_dispute(request):
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
 # NEW: Get user profile with skills and portfolio
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=user_etag)
 def get_user_profile(request):
     if request.method == 'GET':
         try:
@@ -1344,7 +1507,7 @@ def get_assigned_jobs(request):
             user = User.objects.get(id=user_id)
             
             # Get jobs assigned to this freelancer
-            jobs = Job.objects.filter(assigned_freelancer=user).select_related('client')
+            jobs = Job.objects.filter(assigned_freelancer=user).select_related('client').prefetch_related(skills_prefetch())
             
             jobs_data = []
             for job in jobs:
@@ -1359,10 +1522,7 @@ def get_assigned_jobs(request):
                     'status': job.status,
                     'created_at': job.created_at.isoformat(),
                     'completed_at': job.completed_at.isoformat() if job.completed_at else None,
-                    'skills_required': [
-                        {'id': str(skill.id), 'name': skill.name}
-                        for skill in job.skills_required.all()
-                    ]
+                    'skills_required': serialize_skills(job)
                 })
             
             return JsonResponse({
@@ -1558,6 +1718,8 @@ def add_portfolio_item(request):
                 portfolio.file_path = file_upload.file.url
                 portfolio.save()
             
+            touch_users(user.id)
+            
             return JsonResponse({
                 'success': True,
                 'message': 'Portfolio item added successfully',
@@ -1578,22 +1740,85 @@ def get_wallet_transactions(request):
                 return JsonResponse({'error': 'User ID is required'}, status=400)
             
             user = User.objects.get(id=user_id)
-            transactions = WalletTransaction.objects.filter(user=user).order_by('-created_at')
-            
-            transactions_data = []
-            for transaction in transactions:
-                transactions_data.append({
-                    'id': str(transaction.id),
-                    'transaction_type': transaction.transaction_type,
-                    'amount': float(transaction.amount),
-                    'wallet_type': transaction.wallet_type,
-                    'description': transaction.description,
-                    'created_at': transaction.created_at.isoformat(),
-                    'reference': transaction.reference
-                })
+            
+            # Newest first, a page at a time; full histories go through export-wallet-transactions
+            cursor = request.GET.get('cursor')
+            limit = parse_limit(request.GET.get('limit'))
+            transactions, next_cursor = keyset_page(
+                WalletTransaction.objects.filter(user=user), ('created_at', 'id'), cursor, limit
+            )
+            
+            transactions_data = [serialize_wallet_transaction(transaction) for transaction in transactions]
+            
+            return list_response(request, 'transactions', transactions_data, next_cursor=next_cursor)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+async def export_wallet_transactions(request):
+    if request.method == 'GET':
+        try:
+            fmt = request.GET.get('format', 'csv')
+            if fmt not in EXPORT_FORMATS:
+                return JsonResponse({'error': 'format must be "csv" or "ndjson"'}, status=400)
+            filters = parse_export_filters(request.GET)
+            
+            user_id = request.GET.get('user_id')
+            if user_id:
+                user = await User.objects.aget(id=user_id)
+                transactions = filter_transactions(filters, user.id)
+                scope = str(user.id)
+            else:
+                # Platform-wide exports (M-Pesa reconciliation) need a staff admin session
+                staff = await request.auser()
+                if not (staff.is_active and staff.is_staff):
+                    return JsonResponse({'error': 'Staff login required for platform-wide exports'}, status=403)
+                transactions = filter_transactions(filters)
+                scope = 'all'
+        except InvalidExport as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'User not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+        
+        # Rows are fetched a chunk at a time as the client reads
+        response = StreamingHttpResponse(export_stream(transactions, fmt), content_type=EXPORT_FORMATS[fmt])
+        filename = f'wallet-transactions-{scope}-{timezone.now():%Y%m%d%H%M%S}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'private, no-store'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+@cache_control(private=True, no_cache=True)
+def get_wallet_balance(request):
+    if request.method == 'GET':
+        try:
+            user_id = request.GET.get('user_id')
+            if not user_id:
+                return JsonResponse({'error': 'User ID is required'}, status=400)
+            
+            user = User.objects.get(id=user_id)
+            as_of = request.GET.get('as_of')  # Optional ISO timestamp for a past balance
+            try:
+                if as_of:
+                    as_of = parse_timestamp(as_of)
+            except ValidationError:
+                return JsonResponse({'error': 'Invalid as_of timestamp'}, status=400)
+            
+            # From the ledger: latest checkpoint plus the entries since
+            balances = wallet_balances(user, as_of or None)
             
             return JsonResponse({
-                'transactions': transactions_data
+                'earnings_wallet': float(balances['earnings']),
+                'referral_wallet': float(balances['referral']),
+                'wallet_balance': float(balances['earnings'] + balances['referral']),
+                'as_of': (as_of or timezone.now()).isoformat()
             })
         except User.DoesNotExist:
             return JsonResponse({'error': 'User not found'}, status=404)
@@ -1666,6 +1891,8 @@ def add_skill(request):
                 user_skill.years_experience = years_experience
                 user_skill.save()
             
+            touch_users(user.id)
+            
             return JsonResponse({
                 'success': True,
                 'message': 'Skill added successfully',
@@ -1695,6 +1922,8 @@ def add_portfolio_item(request):
                 project_url=project_url
             )
             
+            touch_users(user.id)
+            
             return JsonResponse({
                 'success': True,
                 'message': 'Portfolio item added successfully',
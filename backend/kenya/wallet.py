@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .ledger import system_account, transfer, user_account
+from .models import User, WalletTransaction
+
+# wallet_type -> the User column holding its balance
+WALLET_FIELDS = {
+    'earnings': 'earnings_wallet',
+    'referral': 'referral_wallet',
+}
+
+
+class InsufficientFunds(ValueError):
+    pass
+
+
+def _wallet_field(wallet_type):
+    try:
+        return WALLET_FIELDS[wallet_type]
+    except KeyError:
+        raise ValueError(f'Unknown wallet type {wallet_type}')
+
+
+def _record(user_id, wallet_type, amount, transaction_type, description, counterparty, job, reference):
+    WalletTransaction.objects.create(
+        user_id=user_id,
+        job=job,
+        transaction_type=transaction_type,
+        amount=abs(amount),
+        wallet_type=wallet_type,
+        description=description,
+        reference=reference
+    )
+    wallet = user_account(user_id, wallet_type)
+    source, destination = (counterparty, wallet) if amount > 0 else (wallet, counterparty)
+    transfer(source, destination, abs(amount), transaction_type, description, reference)
+
+
+def _balance(user_id, field):
+    # The row is locked by our UPDATE until commit, so this reads our own result
+    return User.objects.filter(pk=user_id).values_list(field, flat=True).get()
+
+
+def credit(user, wallet_type, amount, transaction_type, description, source='platform',
+           job=None, reference=None, earned=False):
+    """Add amount to user's wallet_type wallet; returns the new balance.
+
+    The balance moves in a single UPDATE ... SET wallet = wallet + amount, so
+    concurrent credits never overwrite each other and no other column is
+    written. The WalletTransaction and the ledger journal (against the
+    platform account source) commit with it. earned also adds to
+    total_earnings.
+    """
+    field = _wallet_field(wallet_type)
+    amount = Decimal(str(amount))
+    if amount <= 0:
+        raise ValueError('Credit amount must be positive')
+    user_id = getattr(user, 'pk', user)
+
+    updates = {field: F(field) + amount, 'updated_at': timezone.now()}
+    if earned:
+        updates['total_earnings'] = F('total_earnings') + amount
+    with transaction.atomic():
+        if not User.objects.filter(pk=user_id).update(**updates):
+            raise User.DoesNotExist('User not found')
+        _record(user_id, wallet_type, amount, transaction_type, description, system_account(source), job, reference)
+        return _balance(user_id, field)
+
+
+def debit(user, wallet_type, amount, transaction_type, description, destination='platform',
+          job=None, reference=None):
+    """Take amount out of user's wallet_type wallet; returns the new balance.
+
+    A conditional UPDATE ... WHERE wallet >= amount, so the balance can never
+    go negative however many debits race; raises InsufficientFunds when the
+    condition fails.
+    """
+    field = _wallet_field(wallet_type)
+    amount = Decimal(str(amount))
+    if amount <= 0:
+        raise ValueError('Debit amount must be positive')
+    user_id = getattr(user, 'pk', user)
+
+    with transaction.atomic():
+        updated = User.objects.filter(pk=user_id, **{f'{field}__gte': amount}).update(
+            **{field: F(field) - amount}, updated_at=timezone.now()
+        )
+        if not updated:
+            if not User.objects.filter(pk=user_id).exists():
+                raise User.DoesNotExist('User not found')
+            raise InsufficientFunds(f'Insufficient balance in {wallet_type} wallet')
+        _record(user_id, wallet_type, -amount, transaction_type, description, system_account(destination), job, reference)
+        return _balance(user_id, field)
@@ -16,7 +16,7 @@ import {
 } from '@mui/material'
 import { AttachMoney, Payment, SkipNext, Verified } from '@mui/icons-material'
 import { useAuth } from '../../contexts/AuthContext'
-import { initiateActivation, getOverview } from '../../services/api'
+import { initiateActivation, getActivationStatus, getOverview } from '../../services/api'
 import Header from '../../components/Header'
 import Sidebar from '../../components/Sidebar'
 import GeometricLoader from '../../components/GeometricLoader'
@@ -87,29 +87,30 @@ function Activation() {
         setSuccess('Payment initiated successfully! Please check your phone for M-Pesa prompt.')
         setCheckoutRequestId(paymentResponse.checkout_request_id)
         
-        // Poll for activation status
+        // Wait for the M-Pesa callback; each request returns as soon as it lands
         const pollActivation = async () => {
-          const maxAttempts = 30 // 30 attempts * 5 seconds = 2.5 minutes
-          let attempts = 0
+          const deadline = Date.now() + 150000 // 2.5 minutes
 
-          const interval = setInterval(async () => {
+          while (Date.now() < deadline) {
             try {
-              attempts++
-              const overview = await getOverview(userData.user_id)
-              if (overview.is_activated) {
-                clearInterval(interval)
+              const status = await getActivationStatus(paymentResponse.checkout_request_id)
+              if (status.is_activated) {
                 setSuccess('Account activated successfully! Redirecting to dashboard...')
                 setTimeout(() => {
                   navigate('/dashboard')
                 }, 2000)
-              } else if (attempts >= maxAttempts) {
-                clearInterval(interval)
-                setError('Payment confirmation taking longer than expected. Please check your M-Pesa transactions and try again.')
+                return
+              }
+              if (status.status !== 'pending') {
+                setError('Payment was not completed. Please try again.')
+                return
               }
             } catch (error) {
               console.error('Error polling activation status:', error)
+              await new Promise((resolve) => setTimeout(resolve, 5000))
             }
-          }, 5000) // Check every 5 seconds
+          }
+          setError('Payment confirmation taking longer than expected. Please check your M-Pesa transactions and try again.')
         }
 
         pollActivation()
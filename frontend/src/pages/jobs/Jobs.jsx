@@ -31,6 +31,8 @@ function Jobs() {
   const { userData } = useAuth()
   const [jobs, setJobs] = useState([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [filters, setFilters] = useState({
     category: '',
     min_budget: '',
@@ -55,6 +57,7 @@ function Jobs() {
     try {
       const response = await getJobs(filters)
       setJobs(response.jobs || [])
+      setNextCursor(response.next_cursor || null)
     } catch (error) {
       console.error('Error fetching jobs:', error)
     } finally {
@@ -62,6 +65,19 @@ function Jobs() {
     }
   }
 
+  const loadMoreJobs = async () => {
+    try {
+      setLoadingMore(true)
+      const response = await getJobs(filters, nextCursor)
+      setJobs((current) => [...current, ...(response.jobs || [])])
+      setNextCursor(response.next_cursor || null)
+    } catch (error) {
+      console.error('Error fetching more jobs:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleFilterChange = (e) => {
     setFilters({
       ...filters,
@@ -269,6 +285,14 @@ function Jobs() {
               )}
             </Grid>
 
+            {nextCursor && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 3 }}>
+                <Button variant="outlined" onClick={loadMoreJobs} disabled={loadingMore}>
+                  {loadingMore ? <CircularProgress size={24} /> : 'Load More Jobs'}
+                </Button>
+              </Box>
+            )}
+
             {/* Application Dialog */}
             <Dialog open={applicationDialogOpen} onClose={() => setApplicationDialogOpen(false)} maxWidth="md" fullWidth>
               <DialogTitle>Apply to Job: {selectedJob?.title}</DialogTitle>
@@ -21,7 +21,8 @@ import {
   Chip,
   Tabs,
   Tab,
-  AppBar
+  AppBar,
+  CircularProgress
 } from '@mui/material'
 import { AccountBalanceWallet, AttachMoney, TrendingUp, TrendingDown, LocalAtm } from '@mui/icons-material'
 import { useAuth } from '../../contexts/AuthContext'
@@ -36,6 +37,8 @@ function Wallet() {
   const { userData, loading: authLoading } = useAuth()
   const [overview, setOverview] = useState(null)
   const [transactions, setTransactions] = useState([])
+  const [transactionsCursor, setTransactionsCursor] = useState(null)
+  const [loadingMoreTransactions, setLoadingMoreTransactions] = useState(false)
   const [withdrawals, setWithdrawals] = useState([])
   const [pageLoading, setPageLoading] = useState(true)
   const [withdrawalDialogOpen, setWithdrawalDialogOpen] = useState(false)
@@ -58,6 +61,7 @@ function Wallet() {
           // Fetch transaction history
           const transactionsResponse = await getWalletTransactions(userData.user_id)
           setTransactions(transactionsResponse.transactions || [])
+          setTransactionsCursor(transactionsResponse.next_cursor || null)
           
           // Fetch withdrawal history
           const withdrawalsResponse = await getWithdrawalHistory(userData.user_id)
@@ -133,6 +137,7 @@ function Wallet() {
       
       const transactionsResponse = await getWalletTransactions(userData.user_id)
       setTransactions(transactionsResponse.transactions || [])
+      setTransactionsCursor(transactionsResponse.next_cursor || null)
       
       const withdrawalsResponse = await getWithdrawalHistory(userData.user_id)
       setWithdrawals(withdrawalsResponse.withdrawals || [])
@@ -144,6 +149,19 @@ function Wallet() {
     }
   }
 
+  const loadMoreTransactions = async () => {
+    try {
+      setLoadingMoreTransactions(true)
+      const transactionsResponse = await getWalletTransactions(userData.user_id, transactionsCursor)
+      setTransactions((current) => [...current, ...(transactionsResponse.transactions || [])])
+      setTransactionsCursor(transactionsResponse.next_cursor || null)
+    } catch (error) {
+      console.error('Error fetching more transactions:', error)
+    } finally {
+      setLoadingMoreTransactions(false)
+    }
+  }
+
   const handleTabChange = (event, newValue) => {
     setActiveTab(newValue)
   }
@@ -338,6 +356,13 @@ function Wallet() {
               <Grid container spacing={3}>
                 <Grid item xs={12}>
                   <WalletTransactions transactions={transactions} />
+                  {transactionsCursor && (
+                    <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                      <Button variant="outlined" onClick={loadMoreTransactions} disabled={loadingMoreTransactions}>
+                        {loadingMoreTransactions ? <CircularProgress size={24} /> : 'Load More Transactions'}
+                      </Button>
+                    </Box>
+                  )}
                 </Grid>
               </Grid>
             )}
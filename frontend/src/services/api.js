@@ -28,6 +28,14 @@ export const initiateActivation = async (paymentData) => {
   return response.data
 }
 
+// Held open by the server until the M-Pesa callback arrives or `timeout` seconds pass
+export const getActivationStatus = async (checkoutRequestId, timeout = 25) => {
+  const response = await api.get('/activation-status/', {
+    params: { checkout_request_id: checkoutRequestId, timeout }
+  })
+  return response.data
+}
+
 export const getOverview = async (userId) => {
   const response = await api.get(`/overview/?user_id=${userId}`)
   return response.data
@@ -68,8 +76,9 @@ export const createJob = async (jobData) => {
   return response.data
 }
 
-export const getJobs = async (filters = {}) => {
+export const getJobs = async (filters = {}, cursor = null) => {
   const params = new URLSearchParams(filters)
+  if (cursor) params.set('cursor', cursor)
   const response = await api.get(`/get-jobs/?${params}`)
   return response.data
 }
@@ -124,8 +133,10 @@ export const getUserReviews = async (userId) => {
   return response.data
 }
 
-export const getWalletTransactions = async (userId) => {
-  const response = await api.get(`/wallet-transactions/?user_id=${userId}`)
+export const getWalletTransactions = async (userId, cursor = null) => {
+  const params = { user_id: userId }
+  if (cursor) params.cursor = cursor
+  const response = await api.get('/wallet-transactions/', { params })
   return response.data
 }
 